@@ -1,3 +1,4 @@
+from functools import partial
 from itertools import chain
 from uuid import uuid4
 
@@ -9,6 +10,8 @@ from pycompss.api.task import task
 from scipy.sparse import issparse
 from sklearn.svm import SVC
 
+from dislib.data import Subset, tree_reduce
+
 
 class CascadeSVM(object):
     """ Cascade Support Vector classification.
@@ -229,27 +232,30 @@ class CascadeSVM(object):
             sup_vec, sup_vec_ids, _ = _out
             q.append((sup_vec, sup_vec_ids))
 
-        # reduction
-        while len(q) > arity:
-            data = q[:arity]
-            del q[:arity]
-
-            flattened_data = chain.from_iterable(data)
-            _out = _train(False, self._random_state, *flattened_data, **params)
-            sup_vec, sup_vec_ids, _ = _out
-            q.append((sup_vec, sup_vec_ids))
-
-            # delete partial results
-            for partial in data:
-                compss_delete_object(partial)
-
-        # last layer
+        # reduction and last layer
         get_clf = (self._check_convergence or self._is_last_iteration())
-        flattened_q = chain.from_iterable(q)
-        _out = _train(get_clf, self._random_state, *flattened_q, **params)
+        root_f = partial(self._train_last_layer, get_clf)
+        _out = tree_reduce(q, self._train_layer, arity, root_f=root_f)
         self._feedback, self._feedback_ids, self._clf = _out
         self.iterations += 1
 
+    def _train_layer(self, *data):
+        flattened_data = chain.from_iterable(data)
+        _out = _train(False, self._random_state, *flattened_data,
+                      **self._clf_params)
+        sup_vec, sup_vec_ids, _ = _out
+
+        # delete partial results
+        for partial_result in data:
+            compss_delete_object(partial_result)
+
+        return sup_vec, sup_vec_ids
+
+    def _train_last_layer(self, get_clf, *data):
+        flattened_data = chain.from_iterable(data)
+        return _train(get_clf, self._random_state, *flattened_data,
+                      **self._clf_params)
+
     def _is_last_iteration(self):
         return self.iterations == self._max_iter - 1
 
@@ -348,14 +354,12 @@ def _train(return_classifier, random_state, *flattened_data, **params):
 
 @task(subset=INOUT)
 def _predict(subset, clf):
-    labels = clf.predict(subset.samples)
-    subset.labels = labels
+    subset.set_labels(clf.predict(subset.samples))
 
 
 @task(subset=INOUT)
 def _decision_function(subset, clf):
-    distances = clf.decision_function(subset.samples)
-    subset.labels = distances
+    subset.set_labels(clf.decision_function(subset.samples))
 
 
 @task(returns=tuple)
@@ -380,7 +384,8 @@ def _merge_scores(*partials):
 
 def _merge(data):
     subset, ids = data[0]
-    subset = subset.copy()
+    # concatenate creates new arrays, so there is no need to copy them here
+    subset = Subset(subset.samples, subset.labels, copy=False)
 
     for subset_x, ids_x in data[1:]:
         subset, ids = _merge_pair(subset, ids, subset_x, ids_x)
@@ -1,4 +1,3 @@
-from numpy.lib import format
 import numpy as np
 import tempfile
 
@@ -6,6 +5,7 @@ from pycompss.api.parameter import FILE_IN, FILE_INOUT
 from pycompss.api.task import task
 
 from dislib.data import Dataset
+from dislib.data.base import _NpyFile
 
 
 class RfDataset(object):
@@ -218,40 +218,6 @@ def transform_to_rf_dataset(dataset: Dataset) -> RfDataset:
     return rf_dataset
 
 
-class _NpyFile(object):
-    def __init__(self, path):
-        self.path = path
-
-        self.shape = None
-        self.fortran_order = None
-        self.dtype = None
-
-    def get_shape(self):
-        if self.shape is None:
-            self._read_header()
-        return self.shape
-
-    def get_fortran_order(self):
-        if self.fortran_order is None:
-            self._read_header()
-        return self.fortran_order
-
-    def get_dtype(self):
-        if self.dtype is None:
-            self._read_header()
-        return self.dtype
-
-    def _read_header(self):
-        with open(self.path, 'rb') as fp:
-            version = format.read_magic(fp)
-            try:
-                format._check_version(version)
-            except ValueError:
-                raise ValueError('Invalid file format.')
-            header_data = format._read_array_header(fp, version)
-            self.shape, self.fortran_order, self.dtype = header_data
-
-
 @task(labels_path=FILE_IN, returns=3)
 def _get_labels(labels_path):
     y = np.genfromtxt(labels_path, dtype=None, encoding='utf-8')
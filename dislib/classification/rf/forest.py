@@ -241,7 +241,7 @@ def _join_predictions(subset, *predictions):
     aggregate = predictions[0]
     for p in predictions[1:]:
         aggregate += p
-    subset.labels = aggregate / len(predictions)
+    subset.set_labels(aggregate / len(predictions))
 
 
 @task(subset=INOUT)
@@ -249,7 +249,7 @@ def _soft_vote(subset, classes, *predictions):
     aggregate = predictions[0]
     for p in predictions[1:]:
         aggregate += p
-    subset.labels = classes[np.argmax(aggregate, axis=1)]
+    subset.set_labels(classes[np.argmax(aggregate, axis=1)])
 
 
 @task(subset=INOUT)
@@ -257,7 +257,7 @@ def _hard_vote(subset, classes, *predictions):
     mode = np.empty((len(predictions[0]),), dtype=int)
     for sample_i, votes in enumerate(zip(*predictions)):
         mode[sample_i] = Counter(votes).most_common(1)[0][0]
-    subset.labels = classes[mode]
+    subset.set_labels(classes[mode])
 
 
 @task(returns=1)
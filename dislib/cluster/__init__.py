@@ -1,5 +1,5 @@
 from dislib.cluster.dbscan.base import DBSCAN
-from dislib.cluster.kmeans.base import KMeans
+from dislib.cluster.kmeans.base import KMeans, MiniBatchKMeans
 from dislib.cluster.gm.base import GaussianMixture
 
-__all__ = ['KMeans', 'DBSCAN', 'GaussianMixture']
+__all__ = ['KMeans', 'MiniBatchKMeans', 'DBSCAN', 'GaussianMixture']
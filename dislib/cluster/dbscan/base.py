@@ -4,7 +4,7 @@ from pycompss.api.parameter import INOUT
 from pycompss.api.task import task
 
 from dislib.cluster.dbscan.classes import Region
-from dislib.utils import as_grid
+from dislib.utils.grid import Grid
 
 
 class DBSCAN():
@@ -43,6 +43,11 @@ class DBSCAN():
 
         This can be used to balance the load in scenarios where samples are not
         evenly distributed in the feature space.
+    binning : string, optional (default="uniform")
+        How to divide each dimension in regions: "uniform", "quantile" or
+        "kd". "quantile" and "kd" balance the number of samples of each region
+        when data is skewed. See ``utils.as_grid()`` for more details. If
+        ``arrange_data=False``, ``binning`` is ignored.
 
     Attributes
     ----------
@@ -66,7 +71,7 @@ class DBSCAN():
     """
 
     def __init__(self, eps=0.5, min_samples=5, arrange_data=True, n_regions=1,
-                 dimensions=None, max_samples=None):
+                 dimensions=None, max_samples=None, binning="uniform"):
         assert n_regions >= 1, \
             "Number of regions must be greater or equal to 1."
 
@@ -79,6 +84,7 @@ class DBSCAN():
         self._subset_sizes = []
         self._sorting = []
         self._max_samples = max_samples
+        self._binning = binning
         self._components = None
 
     def fit(self, dataset):
@@ -86,8 +92,8 @@ class DBSCAN():
 
         If arrange_data=True, data is initially rearranged in a
         multidimensional grid with ``n_regions`` regions per dimension in
-        ``dimensions``. All regions in a specific dimension have the same
-        size.
+        ``dimensions``. By default, all regions in a specific dimension have
+        the same size.
 
         For example, suppose that data contains N partitions of 2-dimensional
         samples (``n_features=2``), where the first feature ranges from 1 to 5
@@ -95,7 +101,8 @@ class DBSCAN():
         re-arranges data into 10^2=100 new partitions, where each partition
         contains the samples that lie in one region of the grid.
         numpy.linspace() is employed to divide the feature space into
-        uniform regions.
+        uniform regions, unless ``binning`` is "quantile" or "kd". Each region
+        exchanges samples with all the regions that are closer than ``eps``.
 
         If data is already arranged in a grid, then the number of partitions
         in data must be equal to ``n_regions`` ^ ``len(dimensions)``. The
@@ -116,14 +123,15 @@ class DBSCAN():
         n_dims = len(self._dimensions)
 
         if self._arrange_data:
-            sorted_data, sorting_ind = as_grid(dataset, self._n_regions,
-                                               self._dimensions, True)
+            layout = Grid(dataset, self._n_regions, self._dimensions,
+                          self._binning)
+            sorted_data, sorting_ind = layout.arrange(dataset, True)
         else:
             self._n_regions = int(np.power(len(dataset), 1 / n_dims))
             sorted_data = dataset
+            layout = Grid(dataset, self._n_regions, self._dimensions)
 
         grid = np.empty((self._n_regions,) * n_dims, dtype=object)
-        region_widths = self._compute_region_widths(dataset)[self._dimensions]
 
         # Create regions
         for subset_idx, region_id in enumerate(np.ndindex(grid.shape)):
@@ -133,10 +141,11 @@ class DBSCAN():
                                      self._eps, sparse)
 
         # Set region neighbours
-        distances = np.ceil(self._eps / region_widths)
+        lower, upper = layout.region_bounds()
 
         for region_id in np.ndindex(grid.shape):
-            self._add_neighbours(grid[region_id], grid, distances)
+            self._add_neighbours(grid[region_id], grid, lower, upper,
+                                 self._eps)
 
         # Run dbscan on each region
         for region_id in np.ndindex(grid.shape):
@@ -184,14 +193,15 @@ class DBSCAN():
         self.fit(dataset)
 
     @staticmethod
-    def _add_neighbours(region, grid, distances):
-        for ind in np.ndindex(grid.shape):
-            if ind == region.id:
-                continue
+    def _add_neighbours(region, grid, lower, upper, eps):
+        cell = np.ravel_multi_index(region.id, grid.shape)
 
-            d = np.abs(np.array(region.id) - np.array(ind))
+        # distance between the closest points of this and every other region
+        gaps = np.maximum(lower - upper[cell], lower[cell] - upper)
+        distances = np.linalg.norm(np.maximum(gaps, 0), axis=1)
 
-            if (d <= distances).all():
+        for ind, distance in zip(np.ndindex(grid.shape), distances):
+            if ind != region.id and distance <= eps:
                 region.add_neighbour(grid[ind])
 
     @staticmethod
@@ -210,11 +220,6 @@ class DBSCAN():
         self._components = compss_wait_on(self._components)
         return len(self._components)
 
-    def _compute_region_widths(self, dataset):
-        min_ = dataset.min_features()
-        max_ = dataset.max_features()
-        return (max_ - min_) / self._n_regions
-
 
 @task(returns=1)
 def _merge_dicts(*dicts):
@@ -259,14 +264,9 @@ def _visit_neighbours(equiv, neighbours, visited, connected):
 
 @task(returns=1)
 def _concatenate_labels(sorting, *labels):
-    final_labels = np.empty(0, dtype=int)
-
-    for label_arr in labels:
-        final_labels = np.concatenate((final_labels, label_arr))
-
-    return final_labels[sorting]
+    return np.concatenate(labels)[sorting]
 
 
 @task(subset=INOUT)
 def _set_labels(subset, labels, begin=0, end=None):
-    subset.labels = labels[begin:end]
+    subset.set_labels(labels[begin:end])
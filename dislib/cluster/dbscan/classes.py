@@ -6,6 +6,8 @@ from scipy.sparse import lil_matrix
 from scipy.sparse.csgraph import connected_components
 from sklearn.metrics import pairwise_distances
 
+from dislib.data import Subset
+
 
 class Region(object):
 
@@ -142,7 +144,8 @@ def _compute_neighbours(epsilon, min_samples, sparse, begin_idx, end_idx,
 
 
 def _concatenate_subsets(*subsets):
-    subset = subsets[0].copy()
+    # concatenate creates new arrays, so there is no need to copy them here
+    subset = Subset(subsets[0].samples, subsets[0].labels, copy=False)
 
     for set in subsets[1:]:
         subset.concatenate(set)
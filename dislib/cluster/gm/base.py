@@ -13,7 +13,7 @@ from sklearn.exceptions import ConvergenceWarning
 from pycompss.api.task import task
 
 from dislib.cluster import KMeans
-from dislib.data import Dataset, Subset
+from dislib.data import Dataset, Subset, tree_reduce
 
 
 @task(returns=1)
@@ -29,12 +29,10 @@ def _estimate_parameters_subset(subset, resp):
     return subsample.shape[0], nk_ss, means_ss
 
 
-def _reduce_estimate_parameters(partials, arity):
-    while len(partials) > 1:
-        partials_subset = partials[:arity]
-        partials = partials[arity:]
-        partials.append(_merge_estimate_parameters(*partials_subset))
-    return aggregate_parameters(partials[0])
+def _reduce_estimate_parameters(partials, arity, partial_nbytes=None):
+    params = tree_reduce(partials, _merge_estimate_parameters, arity,
+                         partial_nbytes)
+    return aggregate_parameters(params)
 
 
 @task(returns=1)
@@ -69,8 +67,8 @@ def _estimate_covariances(dataset, resp, nk, means, reg_covar, covar_type,
         The regularization added to the diagonal of the covariance matrices.
     covar_type : {'full', 'tied', 'diag', 'spherical'}
         The type of precision matrices.
-    arity : int
-        Arity of the reductions.
+    arity : int or None
+        Arity of the reductions. If None, it is chosen automatically.
 
     Returns
     -------
@@ -96,8 +94,9 @@ def _estimate_covariances(dataset, resp, nk, means, reg_covar, covar_type,
         # "diag": _reduce_covariances_diag,
         # "spherical": _reduce_covariances_spherical
     }[covar_type]
+    partial_nbytes = resp.n_features * dataset.n_features ** 2 * 8
     return reduce_covariances_function(covar_type, reg_covar, nk, arity,
-                                       subsets_covariances)
+                                       subsets_covariances, partial_nbytes)
 
 
 @task(returns=1)
@@ -117,13 +116,12 @@ def _estimate_covariances_full(resp, subset, means):
     return covariances
 
 
-def _reduce_covariances_full(covariance_type, reg_covar, nk, arity, partials):
-    while len(partials) > 1:
-        partials_subset = partials[:arity]
-        partials = partials[arity:]
-        partials.append(_merge_covariances_full(*partials_subset))
+def _reduce_covariances_full(covariance_type, reg_covar, nk, arity, partials,
+                             partial_nbytes=None):
+    covariances = tree_reduce(partials, _merge_covariances_full, arity,
+                              partial_nbytes)
     return _aggregate_covariances_full(covariance_type, reg_covar, nk,
-                                       partials[0])
+                                       covariances)
 
 
 @task(returns=1)
@@ -234,7 +232,7 @@ def _estimate_responsibilities(subset, weights, means, precisions_cholesky,
     with np.errstate(under='ignore'):
         # ignore underflow
         resp = np.exp(weighted_log_prob - log_prob_norm[:, np.newaxis])
-    return (log_prob_norm_sum, count), Subset(resp)
+    return (log_prob_norm_sum, count), Subset(resp, copy=False)
 
 
 def _estimate_weighted_log_prob(subset, weights, means, precisions_cholesky,
@@ -354,7 +352,7 @@ def _assign_predictions(dataset, responsabilities):
 
 @task(subset=INOUT)
 def _assign_subset_predictions(subset, responsabilities):
-    subset.labels = responsabilities.samples.argmax(axis=1)
+    subset.set_labels(responsabilities.samples.argmax(axis=1))
 
 
 class GaussianMixture:
@@ -411,8 +409,9 @@ class GaussianMixture:
         If RandomState instance, random_state is the random number generator;
         If None, the random number generator is the RandomState instance used
         by `np.random`.
-    arity : int, optional (default=50)
-        Arity of the reductions.
+    arity : int, optional (default=None)
+        Arity of the reductions. If None, it is chosen from the number of
+        subsets and the size of the partial results.
     verbose: boolean, optional (default=False)
         Whether to print progress information.
 
@@ -470,7 +469,7 @@ class GaussianMixture:
     def __init__(self, n_components=1, covariance_type='full', tol=1e-3,
                  reg_covar=1e-6, max_iter=100, init_params='kmeans',
                  weights_init=None, means_init=None, precisions_init=None,
-                 arity=50, verbose=False, random_state=None):
+                 arity=None, verbose=False, random_state=None):
 
         self.n_components = n_components
         self.tol = tol
@@ -628,11 +627,7 @@ class GaussianMixture:
                                           self.covariance_type)
 
     def _reduce_log_prob_norm(self, partials):
-        while len(partials) > 1:
-            partials_subset = partials[:self._arity]
-            partials = partials[self._arity:]
-            partials.append(_merge_log_prob_norm(*partials_subset))
-        return partials[0]
+        return tree_reduce(partials, _merge_log_prob_norm, self._arity)
 
     def _m_step(self, dataset, resp):
         """M step.
@@ -679,7 +674,9 @@ class GaussianMixture:
         for ss, resp_ss in zip(dataset, resp):
             ss_params = _estimate_parameters_subset(ss, resp_ss)
             subsets_params.append(ss_params)
-        return _reduce_estimate_parameters(subsets_params, self._arity)
+        partial_nbytes = self.n_components * (dataset.n_features + 1) * 8
+        return _reduce_estimate_parameters(subsets_params, self._arity,
+                                           partial_nbytes)
 
     def _check_initial_parameters(self):
         """Check values of the basic parameters."""
@@ -773,7 +770,7 @@ def _resp_subset(labeled_subset, n_components):
     n_samples = len(labels)
     resp_chunk = np.zeros((n_samples, n_components))
     resp_chunk[np.arange(n_samples), labels.astype(int)] = 1
-    return Subset(resp_chunk)
+    return Subset(resp_chunk, copy=False)
 
 
 @task(returns=1)
@@ -781,4 +778,4 @@ def _random_resp_subset(subset, n_components, seed):
     n_samples = subset.samples.shape[0]
     resp_chunk = RandomState(seed).rand(n_samples, n_components)
     resp_chunk /= resp_chunk.sum(axis=1)[:, np.newaxis]
-    return Subset(resp_chunk)
+    return Subset(resp_chunk, copy=False)
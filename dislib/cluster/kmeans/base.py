@@ -2,8 +2,21 @@ import numpy as np
 from pycompss.api.api import compss_wait_on
 from pycompss.api.parameter import INOUT
 from pycompss.api.task import task
-from scipy.sparse import csr_matrix
-from sklearn.metrics import pairwise_distances
+from scipy.sparse import csr_matrix, issparse
+from sklearn.utils import check_random_state
+
+from dislib.data import tree_reduce
+
+# maximum number of elements of the block of distances computed at once
+_DIST_BLOCK_SIZE = 2 ** 22
+
+# number of sampling rounds and expected number of candidates sampled per
+# round and cluster in k-means|| initialization
+_INIT_ROUNDS = 5
+_OVERSAMPLING_FACTOR = 2
+
+# relative slack of the bounds of Hamerly's algorithm
+_BOUND_SLACK = 1e-7
 
 
 class KMeans:
@@ -18,14 +31,53 @@ class KMeans:
         Maximum number of iterations of the k-means algorithm for a single run.
     tol : float, optional (default=1e-4)
         Tolerance for accepting convergence.
-    arity : int, optional (default=50)
+    arity : int, optional (default=None)
         Arity of the reduction carried out during the computation of the new
-        centroids.
+        centroids. If None, it is chosen from the number of subsets and the
+        size of the partial results.
     random_state : int or RandomState, optional (default=None)
         Seed or numpy.random.RandomState instance to generate random numbers
         for centroid initialization.
     verbose: boolean, optional (default=False)
         Whether to print progress information.
+    init : {'random', 'k-means||'}, optional (default='random')
+        Method for centroid initialization:
+
+        - 'random': centroids are drawn uniformly from [0, 1) in every
+          dimension.
+        - 'k-means||': scalable k-means++. Candidate centroids are sampled
+          in parallel from every Subset during a few passes over the data,
+          with a probability proportional to their squared distance to the
+          candidates sampled before. The centroids are then chosen among the
+          candidates with k-means++, weighting each candidate by the number
+          of samples closest to it. This usually requires fewer iterations
+          than 'random'.
+    algorithm : {'lloyd', 'hamerly'}, optional (default='lloyd')
+        K-means algorithm to use:
+
+        - 'lloyd': computes the distance from every sample to every centroid
+          in each iteration.
+        - 'hamerly': keeps an upper bound on the distance of each sample to
+          its closest centroid and a lower bound on the distance to the
+          second closest one between iterations. Distances are only computed
+          for the samples whose bounds, updated with the movement of the
+          centroids and the distances between centroids, cannot guarantee
+          that their closest centroid is unchanged. Results are the same as
+          with 'lloyd', but iterations are faster when few samples change
+          cluster, especially with many clusters. Bounds take three values
+          per sample in the memory of the workers.
+    check_convergence : boolean, optional (default=True)
+        Whether to test for convergence. If False, the algorithm runs for
+        max_iter iterations and the driver only synchronizes at the end of
+        the fit.
+    sync_interval : int, optional (default=1)
+        Number of iterations submitted between two synchronizations of the
+        driver when check_convergence is True. Centroids are updated and
+        tested for convergence in tasks, so iterations can be submitted
+        before knowing whether the previous ones converged. Iterations
+        submitted after convergence are discarded, so results do not depend
+        on sync_interval, but up to sync_interval - 1 iterations can be
+        computed in vain.
 
     Attributes
     ----------
@@ -50,8 +102,11 @@ class KMeans:
     >>> print(kmeans.centers)
     """
 
-    def __init__(self, n_clusters=8, max_iter=10, tol=1e-4, arity=50,
-                 random_state=None, verbose=False):
+    def __init__(self, n_clusters=8, max_iter=10, tol=1e-4, arity=None,
+                 random_state=None, verbose=False, init="random",
+                 algorithm="lloyd", check_convergence=True, sync_interval=1):
+        assert sync_interval >= 1, "sync_interval must be at least 1."
+
         self._n_clusters = n_clusters
         self._max_iter = max_iter
         self._tol = tol
@@ -60,6 +115,10 @@ class KMeans:
         self.centers = None
         self.n_iter = 0
         self._verbose = verbose
+        self._init = init
+        self._algorithm = algorithm
+        self._check_convergence = check_convergence
+        self._sync_interval = sync_interval
 
     def fit(self, dataset):
         """ Compute K-means clustering.
@@ -92,41 +151,131 @@ class KMeans:
         dataset : Dataset
             New data to predict.
         """
+        centers = self.centers
+
+        if issparse(centers):
+            centers = centers.toarray()
+
         for subset in dataset:
-            _predict(subset, self.centers, dataset.sparse)
+            _predict(subset, centers)
 
     def _do_fit(self, dataset, set_labels):
         n_features = dataset.n_features
         sparse = dataset.sparse
 
-        centers = _init_centers(n_features, sparse, self._n_clusters,
-                                self._random_state)
-        self.centers = compss_wait_on(centers)
+        if self._algorithm not in ("lloyd", "hamerly"):
+            raise ValueError("Invalid value for 'algorithm': %s."
+                             % self._algorithm)
 
-        old_centers = None
+        centers = self._initial_centers(dataset)
+        prev_centers = None
+        bounds = [None] * len(dataset)
+        nbytes = self._n_clusters * (n_features + 1) * 8
+
+        # (centers, new centers, shift) of the iterations submitted since the
+        # last synchronization
+        pending = []
         iteration = 0
+        last = None
 
-        while not self._converged(old_centers, iteration, sparse):
-            old_centers = self.centers.copy()
+        while last is None:
             partials = []
 
-            for subset in dataset:
-                partial = _partial_sum(subset, old_centers, set_labels, sparse)
+            for i, subset in enumerate(dataset):
+                if self._algorithm == "hamerly":
+                    partial, bounds[i] = _hamerly_partial_sum(
+                        subset, bounds[i], centers, prev_centers, set_labels)
+                else:
+                    partial = _partial_sum(subset, centers, set_labels)
+
                 partials.append(partial)
 
-            self._recompute_centers(partials)
+            total = tree_reduce(partials, _merge, self._arity, nbytes)
+            new_centers = _update_centers(centers, total)
+            shift = None
+
+            if self._check_convergence:
+                shift = _center_shift(centers, new_centers)
+
+            pending.append((centers, new_centers, shift))
+            prev_centers, centers = centers, new_centers
             iteration += 1
 
-        self.n_iter = iteration
+            if iteration >= self._max_iter or (
+                    self._check_convergence and
+                    iteration % self._sync_interval == 0):
+                last = self._last_iteration(pending, iteration)
 
-    def _converged(self, old_centers, iteration, sparse):
-        dist_f = _vec_euclid if not sparse else pairwise_distances
+                if last is None:
+                    pending = []
 
-        if old_centers is not None:
-            diff = 0
+        used_centers, centers, _ = pending[last - iteration - 1]
+
+        # iterations submitted after convergence set labels with newer
+        # centers
+        if set_labels and last < iteration:
+            for subset in dataset:
+                _predict(subset, used_centers)
+
+        self.centers = compss_wait_on(centers)
+        self.n_iter = last
+
+        if sparse:
+            self.centers = csr_matrix(self.centers)
 
-            for i, center in enumerate(self.centers):
-                diff += dist_f(center, old_centers[i])
+    def _initial_centers(self, dataset):
+        if self._init == "random":
+            centers = _init_centers(dataset.n_features, self._n_clusters,
+                                    self._random_state)
+        elif self._init == "k-means||":
+            centers = self._init_kmeans_parallel(dataset)
+        else:
+            raise ValueError("Invalid value for 'init': %s." % self._init)
+
+        return compss_wait_on(centers)
+
+    def _init_kmeans_parallel(self, dataset):
+        random_state = check_random_state(self._random_state)
+        sizes = dataset.subsets_sizes()
+
+        # the first candidate is a sample chosen uniformly at random
+        index = random_state.randint(sum(sizes))
+        set_idx = np.searchsorted(np.cumsum(sizes), index, side="right")
+        row = index - sum(sizes[:set_idx])
+        candidates = [_get_rows(dataset[set_idx], [row])]
+
+        sq_dists = [None] * len(dataset)
+        factor = _OVERSAMPLING_FACTOR * self._n_clusters
+
+        for _ in range(_INIT_ROUNDS):
+            costs = []
+
+            for i, subset in enumerate(dataset):
+                sq_dists[i], cost = _update_sq_dists(subset, sq_dists[i],
+                                                     candidates[-1])
+                costs.append(cost)
+
+            total_cost = _sum(*costs)
+            round_candidates = []
+
+            for subset, subset_sq_dists in zip(dataset, sq_dists):
+                seed = random_state.randint(np.iinfo(np.int32).max)
+                round_candidates.append(
+                    _sample_candidates(subset, subset_sq_dists, factor,
+                                       total_cost, seed))
+
+            candidates.append(_stack(*round_candidates))
+
+        candidates = _stack(*candidates)
+        counts = [_count_closest(subset, candidates) for subset in dataset]
+        weights = tree_reduce(counts, _merge, self._arity)
+        seed = random_state.randint(np.iinfo(np.int32).max)
+
+        return _kmeans_plusplus(candidates, weights, self._n_clusters, seed)
+
+    def _converged(self, old_centers, iteration):
+        if old_centers is not None:
+            diff = np.linalg.norm(self.centers - old_centers, axis=1).sum()
 
             if self._verbose:
                 print("Iteration %s - Convergence crit. = %s"
@@ -134,17 +283,187 @@ class KMeans:
 
             return diff < self._tol ** 2 or iteration >= self._max_iter
 
-    def _recompute_centers(self, partials):
-        while len(partials) > 1:
-            partials_subset = partials[:self._arity]
-            partials = partials[self._arity:]
-            partials.append(_merge(*partials_subset))
+    def _last_iteration(self, pending, iteration):
+        """ Returns the first converged iteration among the pending ones,
+        the current iteration if max_iter is reached, and None otherwise.
+        """
+        first = iteration - len(pending) + 1
+
+        if self._check_convergence:
+            shifts = compss_wait_on([shift for _, _, shift in pending])
+
+            for it, shift in enumerate(shifts, first):
+                if self._verbose:
+                    print("Iteration %s - Convergence crit. = %s"
+                          % (it, shift))
+
+                if shift < self._tol ** 2:
+                    return it
+
+        if iteration >= self._max_iter:
+            return iteration
+
+        return None
+
+    def _reduce_partials(self, partials, n_features):
+        nbytes = self._n_clusters * (n_features + 1) * 8
+        total = tree_reduce(partials, _merge, self._arity, nbytes)
+        return compss_wait_on(total)
+
+
+class MiniBatchKMeans(KMeans):
+    """ Perform K-means clustering with mini-batches.
+
+    Each iteration assigns a random sample of the dataset to the closest
+    centroids, and moves each centroid towards the mean of its samples with
+    a learning rate equal to the number of samples of the centroid in the
+    mini-batch divided by the number of samples assigned to it so far. Only
+    the Subsets that contribute samples to a mini-batch are processed.
+
+    Parameters
+    ----------
+    n_clusters : int, optional (default=8)
+        The number of clusters to form as well as the number of centroids to
+        generate.
+    batch_size : int, optional (default=1000)
+        Number of samples of each mini-batch. Samples are drawn with
+        replacement from the whole dataset.
+    max_iter : int, optional (default=100)
+        Maximum number of mini-batches processed by fit.
+    tol : float, optional (default=0.0)
+        Tolerance for accepting convergence based on the movement of the
+        centroids between two mini-batches. 0 disables early stopping.
+    arity : int, optional (default=None)
+        Arity of the reduction of the partial results of each mini-batch. If
+        None, it is chosen from the number of partial results and their
+        size.
+    random_state : int or RandomState, optional (default=None)
+        Seed or numpy.random.RandomState instance to generate random numbers
+        for centroid initialization and mini-batch sampling.
+    verbose: boolean, optional (default=False)
+        Whether to print progress information.
+    init : {'random', 'k-means||'}, optional (default='random')
+        Method for centroid initialization. See KMeans.
+
+    Attributes
+    ----------
+    centers : ndarray
+        Computed centroids.
+    counts : ndarray
+        Number of samples assigned to each centroid so far.
+    n_iter : int
+        Number of mini-batches processed.
+
+    Examples
+    --------
+    >>> from dislib.cluster import MiniBatchKMeans
+    >>> import numpy as np
+    >>> x = np.array([[1, 2], [1, 4], [1, 0], [4, 2], [4, 4], [4, 0]])
+    >>> from dislib.data import load_data
+    >>> train_data = load_data(x=x, subset_size=2)
+    >>> kmeans = MiniBatchKMeans(n_clusters=2, batch_size=4, random_state=0)
+    >>> kmeans.fit(train_data)
+    >>> new_data = load_data(x=np.array([[0, 0], [4, 4]]), subset_size=2)
+    >>> kmeans.partial_fit(new_data)
+    >>> print(kmeans.centers)
+    """
+
+    def __init__(self, n_clusters=8, batch_size=1000, max_iter=100, tol=0.0,
+                 arity=None, random_state=None, verbose=False,
+                 init="random"):
+        super(MiniBatchKMeans, self).__init__(n_clusters, max_iter, tol,
+                                              arity, random_state, verbose,
+                                              init)
+        self._batch_size = batch_size
+        self.counts = None
+
+    def fit(self, dataset):
+        """ Compute K-means clustering with mini-batches of the dataset.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Samples to cluster.
+        """
+        random_state = check_random_state(self._random_state)
+        sizes = np.array(dataset.subsets_sizes())
+        self._start(dataset)
+
+        old_centers = None
+        iteration = 0
+
+        while not self._converged(old_centers, iteration):
+            old_centers = self.centers.copy()
+            batch_sizes = random_state.multinomial(self._batch_size,
+                                                   sizes / sizes.sum())
+            partials = []
+
+            for subset, batch_size in zip(dataset, batch_sizes):
+                if batch_size > 0:
+                    seed = random_state.randint(np.iinfo(np.int32).max)
+                    partials.append(_batch_partial_sum(subset, old_centers,
+                                                       batch_size, seed))
+
+            self._apply_minibatch(partials, dataset.n_features)
+            iteration += 1
+
+        self.n_iter = iteration
+
+        if dataset.sparse:
+            self.centers = csr_matrix(self.centers)
+
+    def fit_predict(self, dataset):
+        """ Compute K-means clustering with mini-batches of the dataset, and
+        sets the cluster labels of the input Dataset.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Samples to cluster.
+        """
+        self.fit(dataset)
+        self.predict(dataset)
+
+    def partial_fit(self, dataset):
+        """ Updates the centroids with a single mini-batch made of all the
+        samples in dataset. Centroids are initialized with dataset in the
+        first call.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Mini-batch, for example, newly arrived Subsets.
+        """
+        if self.centers is None:
+            self._start(dataset)
+        elif issparse(self.centers):
+            self.centers = self.centers.toarray()
+
+        partials = [_partial_sum(subset, self.centers, False)
+                    for subset in dataset]
+
+        self._apply_minibatch(partials, dataset.n_features)
+        self.n_iter += 1
+
+        if dataset.sparse:
+            self.centers = csr_matrix(self.centers)
+
+    def _start(self, dataset):
+        self.centers = self._initial_centers(dataset)
+        self.counts = np.zeros(self._n_clusters)
+        self.n_iter = 0
 
-        partials = compss_wait_on(partials)
+    def _apply_minibatch(self, partials, n_features):
+        total = self._reduce_partials(partials, n_features)
+        counts = total[:, -1]
+        self.counts += counts
+        non_empty = counts != 0
 
-        for idx, sum_ in enumerate(partials[0]):
-            if sum_[1] != 0:
-                self.centers[idx] = sum_[0] / sum_[1]
+        # equivalent to moving each centroid towards each of its samples with
+        # a learning rate of 1 / counts
+        shift = total[non_empty, :-1] - \
+            counts[non_empty, np.newaxis] * self.centers[non_empty]
+        self.centers[non_empty] += shift / self.counts[non_empty, np.newaxis]
 
 
 @task(returns=np.array)
@@ -153,35 +472,91 @@ def _get_label(subset):
 
 
 @task(returns=np.array)
-def _init_centers(n_features, sparse, n_clusters, random_state):
+def _init_centers(n_features, n_clusters, random_state):
     np.random.seed(random_state)
-    centers = np.random.random((n_clusters, n_features))
+    return np.random.random((n_clusters, n_features))
 
-    if sparse:
-        centers = csr_matrix(centers)
 
-    return centers
+@task(subset=INOUT, returns=np.array)
+def _partial_sum(subset, centers, set_labels):
+    """ Returns an array of shape (n_clusters, n_features + 1) with the sum
+    of the samples of each cluster followed by their number. """
+    labels = _closest_centers(subset.samples, centers)
 
+    if set_labels:
+        subset.set_labels(labels)
 
-@task(subset=INOUT, returns=np.array)
-def _partial_sum(subset, centers, set_labels, sparse):
-    partials = np.zeros((centers.shape[0], 2), dtype=object)
-    dist_f = _vec_matrix_euclid if not sparse else pairwise_distances
+    return _cluster_sums(subset.samples, labels, centers.shape[0])
+
+
+@task(subset=INOUT, returns=2)
+def _hamerly_partial_sum(subset, bounds, centers, prev_centers, set_labels):
+    """ Same as _partial_sum using Hamerly's bounds. bounds is a tuple with
+    the closest center of each sample, an upper bound of the distance to it
+    and a lower bound of the distance to the second closest center, computed
+    with prev_centers. Returns the partial sums and the updated bounds. """
+    samples = subset.samples
+
+    if bounds is None:
+        labels, upper, lower = _two_closest_centers(samples, centers)
+    else:
+        labels, upper, lower = bounds
+        shifts = np.linalg.norm(centers - prev_centers, axis=1)
+        max_shifts = np.full(shifts.size, shifts.max())
+
+        # maximum shift of the centers other than the closest one
+        if shifts.size > 1:
+            first, second = np.argsort(shifts)[::-1][:2]
+            max_shifts[first] = shifts[second]
+
+        upper = upper + shifts[labels]
+        lower = lower - max_shifts[labels]
+
+        # half the distance from each center to the closest other center
+        center_dists = np.sqrt(_sq_distances(centers, centers))
+        np.fill_diagonal(center_dists, np.inf)
+        half_dists = center_dists.min(axis=1) / 2
+
+        # slack that covers the rounding errors of the distances, so that
+        # samples are only skipped if Lloyd would not reassign them
+        slack = _BOUND_SLACK * (np.sqrt(_sq_row_norms(samples)) +
+                                np.sqrt(_sq_row_norms(centers).max()))
+        limit = np.maximum(half_dists[labels], lower) - slack
+        check = np.flatnonzero(upper + slack >= limit)
+
+        # tighten the upper bound of the samples that cannot be skipped
+        closest = centers[labels[check]]
+        sq_upper = _sq_row_norms(samples[check]) + \
+            _sq_row_norms(closest) - 2 * _row_dots(samples[check], closest)
+        upper[check] = np.sqrt(np.maximum(sq_upper, 0))
+        check = check[upper[check] + slack[check] >= limit[check]]
 
-    for idx, sample in enumerate(subset.samples):
-        dist = dist_f(sample, centers)
-        min_center = np.argmin(dist)
+        if check.size > 0:
+            labels = labels.copy()
+            labels[check], upper[check], lower[check] = \
+                _two_closest_centers(samples[check], centers)
 
-        if set_labels:
-            subset.set_label(idx, min_center)
+    if set_labels:
+        subset.set_labels(labels)
 
-        partials[min_center][0] += sample
-        partials[min_center][1] += 1
+    partial = _cluster_sums(samples, labels, centers.shape[0])
 
-    return partials
+    return partial, (labels, upper, lower)
 
 
-@task(returns=dict)
+@task(returns=np.array)
+def _batch_partial_sum(subset, centers, n_samples, seed):
+    """ Same as _partial_sum for n_samples rows of the subset drawn with
+    replacement. """
+    rows = np.random.RandomState(seed).randint(subset.samples.shape[0],
+                                               size=n_samples)
+    samples = subset.samples[rows]
+    labels = _closest_centers(samples, centers)
+
+    return _cluster_sums(samples, labels, centers.shape[0])
+
+
+@task(returns=np.array)
 def _merge(*data):
     accum = data[0].copy()
 
@@ -191,19 +566,194 @@ def _merge(*data):
     return accum
 
 
+@task(returns=np.array)
+def _update_centers(centers, total):
+    counts = total[:, -1]
+    non_empty = counts != 0
+    new_centers = np.array(centers, dtype=float)
+    new_centers[non_empty] = total[non_empty, :-1] / \
+        counts[non_empty, np.newaxis]
+
+    return new_centers
+
+
+@task(returns=float)
+def _center_shift(centers, new_centers):
+    return np.linalg.norm(new_centers - centers, axis=1).sum()
+
+
 @task(subset=INOUT)
-def _predict(subset, centers, sparse):
-    dist_f = _vec_matrix_euclid if not sparse else pairwise_distances
+def _predict(subset, centers):
+    subset.set_labels(_closest_centers(subset.samples, centers))
 
-    for sample_idx, sample in enumerate(subset.samples):
-        dist = dist_f(sample, centers)
-        label = np.argmin(dist)
-        subset.set_label(sample_idx, label)
 
+@task(returns=1)
+def _get_rows(subset, rows):
+    samples = subset.samples[rows]
 
-def _vec_matrix_euclid(vector, matrix):
-    return np.linalg.norm(vector - matrix, axis=1)
+    if issparse(samples):
+        samples = samples.toarray()
 
+    return np.asarray(samples, dtype=float)
 
-def _vec_euclid(vec1, vec2):
-    return np.linalg.norm(vec1 - vec2)
+
+@task(returns=2)
+def _update_sq_dists(subset, sq_dists, candidates):
+    """ Updates the squared distance of each sample to its closest candidate
+    with new candidates, and returns the sum of the distances. """
+    if candidates.shape[0] > 0:
+        _, new_sq_dists = _closest_centers(subset.samples, candidates, True)
+
+        if sq_dists is not None:
+            new_sq_dists = np.minimum(sq_dists, new_sq_dists)
+
+        sq_dists = new_sq_dists
+
+    return sq_dists, sq_dists.sum()
+
+
+@task(returns=1)
+def _sum(*values):
+    return sum(values)
+
+
+@task(returns=1)
+def _sample_candidates(subset, sq_dists, factor, total_cost, seed):
+    if total_cost == 0:
+        return np.empty((0, subset.samples.shape[1]))
+
+    probs = np.minimum(1, factor * sq_dists / total_cost)
+    rows = np.random.RandomState(seed).random_sample(probs.size) < probs
+    samples = subset.samples[rows]
+
+    if issparse(samples):
+        samples = samples.toarray()
+
+    return np.asarray(samples, dtype=float)
+
+
+@task(returns=1)
+def _stack(*arrays):
+    return np.vstack(arrays)
+
+
+@task(returns=np.array)
+def _count_closest(subset, candidates):
+    labels = _closest_centers(subset.samples, candidates)
+    return np.bincount(labels, minlength=candidates.shape[0]).astype(float)
+
+
+@task(returns=np.array)
+def _kmeans_plusplus(points, weights, n_clusters, seed):
+    """ Chooses n_clusters of the weighted points with k-means++. """
+    random_state = np.random.RandomState(seed)
+    centers = np.empty((n_clusters, points.shape[1]))
+    probs = weights / weights.sum()
+    sq_dists = None
+
+    for i in range(n_clusters):
+        if sq_dists is not None and np.dot(weights, sq_dists) > 0:
+            probs = weights * sq_dists / np.dot(weights, sq_dists)
+
+        centers[i] = points[random_state.choice(points.shape[0], p=probs)]
+        new_sq_dists = ((points - centers[i]) ** 2).sum(axis=1)
+
+        if sq_dists is None:
+            sq_dists = new_sq_dists
+        else:
+            sq_dists = np.minimum(sq_dists, new_sq_dists)
+
+    return centers
+
+
+def _cluster_sums(samples, labels, n_clusters):
+    # indicator matrix of the clusters, with the samples of each cluster in
+    # their original order
+    order = np.argsort(labels, kind="mergesort")
+    counts = np.bincount(labels, minlength=n_clusters)
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    indicator = csr_matrix((np.ones(labels.size), order, indptr),
+                           shape=(n_clusters, labels.size))
+    sums = indicator @ samples
+
+    if issparse(sums):
+        sums = sums.toarray()
+
+    return np.hstack((sums, counts[:, np.newaxis]))
+
+
+def _two_closest_centers(samples, centers):
+    """ Returns the index of the closest center to each sample, and the
+    distances to the closest and second closest centers. The closest center
+    is chosen as in _closest_centers. """
+    n_samples = samples.shape[0]
+    sq_norms = np.einsum("ij,ij->i", centers, centers)
+    labels = np.empty(n_samples, dtype=int)
+    first = np.empty(n_samples)
+    second = np.full(n_samples, np.inf)
+    block_rows = max(1, _DIST_BLOCK_SIZE // centers.shape[0])
+
+    for start in range(0, n_samples, block_rows):
+        end = min(start + block_rows, n_samples)
+        block = samples[start:end]
+        dist = sq_norms - 2 * (block @ centers.T)
+        rows = np.arange(end - start)
+        labels[start:end] = np.argmin(dist, axis=1)
+        block_norms = _sq_row_norms(block)
+        first[start:end] = dist[rows, labels[start:end]] + block_norms
+
+        if centers.shape[0] > 1:
+            dist[rows, labels[start:end]] = np.inf
+            second[start:end] = dist.min(axis=1) + block_norms
+
+    return labels, np.sqrt(np.maximum(first, 0)), \
+        np.sqrt(np.maximum(second, 0))
+
+
+def _sq_distances(x, y):
+    sq_dists = _sq_row_norms(x)[:, np.newaxis] - 2 * (x @ y.T) + \
+        _sq_row_norms(y)
+    return np.maximum(sq_dists, 0)
+
+
+def _sq_row_norms(x):
+    if issparse(x):
+        return np.asarray(x.multiply(x).sum(axis=1)).ravel()
+
+    return np.einsum("ij,ij->i", x, x)
+
+
+def _row_dots(x, y):
+    if issparse(x):
+        return np.asarray(x.multiply(y).sum(axis=1)).ravel()
+
+    return np.einsum("ij,ij->i", x, y)
+
+
+def _closest_centers(samples, centers, return_sq_dists=False):
+    """ Returns the index of the closest center to each sample and,
+    optionally, the squared distance to it. Squared distances are computed
+    as ||x||^2 - 2 x.c + ||c||^2 in blocks of rows, adding ||x||^2 only if
+    the distances are returned, as it does not change the closest center.
+    """
+    n_samples = samples.shape[0]
+    sq_norms = np.einsum("ij,ij->i", centers, centers)
+    labels = np.empty(n_samples, dtype=int)
+    sq_dists = np.empty(n_samples) if return_sq_dists else None
+    block_rows = max(1, _DIST_BLOCK_SIZE // centers.shape[0])
+
+    for start in range(0, n_samples, block_rows):
+        end = min(start + block_rows, n_samples)
+        block = samples[start:end]
+        dist = sq_norms - 2 * (block @ centers.T)
+        labels[start:end] = np.argmin(dist, axis=1)
+
+        if return_sq_dists:
+            min_dist = dist[np.arange(end - start), labels[start:end]]
+            sq_dists[start:end] = np.maximum(
+                min_dist + _sq_row_norms(block), 0)
+
+    if return_sq_dists:
+        return labels, sq_dists
+
+    return labels
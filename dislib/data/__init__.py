@@ -1,6 +1,10 @@
-from dislib.data.classes import Subset, Dataset
+from dislib.data.classes import Subset, Dataset, LazySubset, SubsetStats, \
+    tree_reduce
 from dislib.data.base import load_data, load_libsvm_file, load_libsvm_files, \
-    load_txt_file, load_txt_files
+    load_txt_file, load_txt_files, load_npy_file, load_npz_file, load
+from dislib.data.array import Array, load_array
 
-__all__ = ['Dataset', 'Subset', 'load_data', 'load_libsvm_file',
-           'load_libsvm_files', 'load_txt_file', 'load_txt_files']
+__all__ = ['Array', 'Dataset', 'LazySubset', 'Subset', 'SubsetStats', 'load',
+           'load_array', 'load_data', 'load_libsvm_file', 'load_libsvm_files',
+           'load_txt_file', 'load_txt_files', 'load_npy_file',
+           'load_npz_file', 'tree_reduce']
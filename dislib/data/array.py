@@ -0,0 +1,372 @@
+from copy import copy
+
+import numpy as np
+import scipy.sparse as sp
+from pycompss.api.api import compss_wait_on
+from pycompss.api.task import task
+from scipy.sparse import issparse
+
+from dislib.data.classes import Dataset, Subset
+
+
+class Array(object):
+    """ A 2-dimensional array divided in blocks that can be stored in a
+    distributed manner.
+
+    Blocks are arranged in a grid of rows and columns of blocks. All the
+    blocks in the same row of blocks have the same number of rows, and all
+    the blocks in the same column of blocks have the same number of columns.
+    Blocks can be future objects stored remotely. Transposed arrays are
+    views of the blocks of the original array, which are transposed inside
+    the tasks that use them.
+
+    Parameters
+    ----------
+    blocks : list
+        List of lists of blocks, where blocks[i][j] is the block in the i-th
+        row and j-th column of blocks. Blocks are ndarrays, or CSR matrices
+        if sparse is True.
+    row_sizes : list
+        Number of rows of the blocks in each row of blocks.
+    col_sizes : list
+        Number of columns of the blocks in each column of blocks.
+    sparse : boolean, optional (default=False)
+        Whether the blocks are sparse matrices.
+
+    Attributes
+    ----------
+    shape : tuple
+        Number of rows and columns of the array.
+    n_blocks : tuple
+        Number of rows and columns of blocks.
+    sparse : boolean
+        True if the blocks are sparse matrices.
+    """
+
+    def __init__(self, blocks, row_sizes, col_sizes, sparse=False):
+        assert len(blocks) == len(row_sizes), \
+            "The number of rows of blocks does not match row_sizes."
+        assert all(len(row) == len(col_sizes) for row in blocks), \
+            "The number of columns of blocks does not match col_sizes."
+
+        self._blocks = blocks
+        self._row_sizes = list(row_sizes)
+        self._col_sizes = list(col_sizes)
+        self._sparse = sparse
+        self._transposed = False
+
+    @property
+    def shape(self):
+        return sum(self._row_sizes), sum(self._col_sizes)
+
+    @property
+    def n_blocks(self):
+        return len(self._row_sizes), len(self._col_sizes)
+
+    @property
+    def sparse(self):
+        return self._sparse
+
+    def get_block(self, i, j):
+        """ Returns a block of the array.
+
+        Parameters
+        ----------
+        i : int
+            Row of blocks.
+        j : int
+            Column of blocks.
+
+        Returns
+        -------
+        block : ndarray or sparse matrix
+            The block, which might be a future object. If the array is a
+            transposed view, the block is transposed by a task.
+        """
+        if self._transposed:
+            return _transpose_block(self._blocks[j][i])
+
+        return self._blocks[i][j]
+
+    def transpose(self):
+        """ Transposes the array without running any task. The returned
+        array is a view of the same blocks, which are transposed inside the
+        tasks that use them.
+
+        Returns
+        -------
+        array_t : Array
+            Transposed array.
+        """
+        array_t = copy(self)
+        array_t._row_sizes = self._col_sizes
+        array_t._col_sizes = self._row_sizes
+        array_t._transposed = not self._transposed
+
+        return array_t
+
+    def __getitem__(self, item):
+        """ Returns a slice of the array as a new Array. Blocks that are
+        entirely selected are reused without running any task.
+
+        Parameters
+        ----------
+        item : tuple
+            Pair of row and column selectors. Selectors can be integers or
+            slices without step.
+
+        Returns
+        -------
+        sliced : Array
+        """
+        if not isinstance(item, tuple):
+            item = (item, slice(None))
+
+        rows, cols = item
+
+        if self._transposed:
+            return self.transpose()[cols, rows].transpose()
+
+        row_ranges = _block_ranges(self._row_sizes, rows)
+        col_ranges = _block_ranges(self._col_sizes, cols)
+        blocks = []
+
+        for i, r_start, r_end in row_ranges:
+            row = []
+
+            for j, c_start, c_end in col_ranges:
+                block = self._blocks[i][j]
+
+                if (r_start, r_end) != (0, self._row_sizes[i]) or \
+                        (c_start, c_end) != (0, self._col_sizes[j]):
+                    block = _slice_block(block, r_start, r_end, c_start,
+                                         c_end)
+
+                row.append(block)
+
+            blocks.append(row)
+
+        row_sizes = [end - start for _, start, end in row_ranges]
+        col_sizes = [end - start for _, start, end in col_ranges]
+
+        return Array(blocks, row_sizes, col_sizes, self._sparse)
+
+    def sum(self, axis=0):
+        """ Returns the sum of the array along an axis.
+
+        Parameters
+        ----------
+        axis : int, optional (default=0)
+            Axis along which to sum. 0 sums the rows and 1 sums the columns.
+
+        Returns
+        -------
+        sum : Array
+            Dense array of shape (1, n_columns) if axis is 0, and
+            (n_rows, 1) if axis is 1.
+        """
+        return self._reduce(np.sum, axis)
+
+    def min(self, axis=0):
+        """ Returns the minimum of the array along an axis.
+
+        Parameters
+        ----------
+        axis : int, optional (default=0)
+            Axis along which to operate.
+
+        Returns
+        -------
+        min : Array
+            Dense array of shape (1, n_columns) if axis is 0, and
+            (n_rows, 1) if axis is 1.
+        """
+        return self._reduce(np.min, axis)
+
+    def max(self, axis=0):
+        """ Returns the maximum of the array along an axis.
+
+        Parameters
+        ----------
+        axis : int, optional (default=0)
+            Axis along which to operate.
+
+        Returns
+        -------
+        max : Array
+            Dense array of shape (1, n_columns) if axis is 0, and
+            (n_rows, 1) if axis is 1.
+        """
+        return self._reduce(np.max, axis)
+
+    def collect(self):
+        """ Returns the whole array. This method performs a synchronization
+        on all the blocks.
+
+        Returns
+        -------
+        array : ndarray or sparse matrix
+        """
+        self._blocks = compss_wait_on(self._blocks)
+
+        if self._sparse:
+            array = sp.bmat(self._blocks, format="csr")
+        else:
+            array = np.block(self._blocks)
+
+        if self._transposed:
+            return _transpose(array)
+
+        return array
+
+    def to_dataset(self):
+        """ Converts the array to a Dataset with one Subset per row of
+        blocks.
+
+        Returns
+        -------
+        dataset : Dataset
+            Unlabeled dataset.
+        """
+        dataset = Dataset(n_features=self.shape[1], sparse=self._sparse)
+        rows = self._blocks
+
+        if self._transposed:
+            rows = list(map(list, zip(*rows)))
+
+        for row, n_samples in zip(rows, self._row_sizes):
+            subset = _hstack_to_subset(self._sparse, self._transposed, *row)
+            dataset.append(subset, n_samples)
+
+        return dataset
+
+    def _reduce(self, f, axis):
+        assert axis in (0, 1), "axis must be 0 or 1."
+
+        if self._transposed:
+            return self.transpose()._reduce(f, 1 - axis).transpose()
+
+        blocks = self._blocks
+
+        if axis == 1:
+            blocks = list(map(list, zip(*blocks)))
+
+        reduced = []
+
+        for col in zip(*blocks):
+            partials = [_reduce_block(block, f, axis) for block in col]
+            reduced.append(_merge_reduced(f, axis, *partials))
+
+        if axis == 0:
+            return Array([reduced], [1], self._col_sizes)
+
+        return Array([[block] for block in reduced], self._row_sizes, [1])
+
+
+def load_array(x, block_size):
+    """ Loads an ndarray or a sparse matrix into an Array.
+
+    Parameters
+    ----------
+    x : ndarray or sparse matrix, shape=[n_rows, n_columns]
+        Input data.
+    block_size : tuple
+        Number of rows and columns of the blocks. Blocks in the last row or
+        column of blocks can be smaller.
+
+    Returns
+    -------
+    array : Array
+    """
+    sparse = issparse(x)
+
+    if sparse:
+        x = sp.csr_matrix(x)
+
+    row_starts = range(0, x.shape[0], block_size[0])
+    col_starts = range(0, x.shape[1], block_size[1])
+    blocks = []
+
+    for i in row_starts:
+        row = []
+
+        for j in col_starts:
+            block = x[i: i + block_size[0], j: j + block_size[1]]
+            row.append(block.copy())
+
+        blocks.append(row)
+
+    row_sizes = [min(block_size[0], x.shape[0] - i) for i in row_starts]
+    col_sizes = [min(block_size[1], x.shape[1] - j) for j in col_starts]
+
+    return Array(blocks, row_sizes, col_sizes, sparse)
+
+
+def _block_ranges(sizes, key):
+    """ Returns a (block index, start, end) tuple for each block that
+    intersects with key, where start and end are relative to the block. """
+    if isinstance(key, slice):
+        assert key.step in (None, 1), "Slices with step are not supported."
+        start, stop, _ = key.indices(sum(sizes))
+    else:
+        start = key if key >= 0 else key + sum(sizes)
+        stop = start + 1
+
+    ranges = []
+    offset = 0
+
+    for index, size in enumerate(sizes):
+        block_start = max(start - offset, 0)
+        block_end = min(stop - offset, size)
+
+        if block_start < block_end:
+            ranges.append((index, block_start, block_end))
+
+        offset += size
+
+    return ranges
+
+
+def _transpose(block):
+    if issparse(block):
+        return block.transpose().tocsr()
+
+    return block.transpose().copy()
+
+
+@task(returns=1)
+def _transpose_block(block):
+    return _transpose(block)
+
+
+@task(returns=1)
+def _slice_block(block, r_start, r_end, c_start, c_end):
+    return block[r_start:r_end, c_start:c_end].copy()
+
+
+@task(returns=1)
+def _reduce_block(block, f, axis):
+    reduced = f(block, axis=axis)
+
+    if issparse(reduced):
+        reduced = reduced.toarray()
+
+    return np.asarray(reduced).reshape((1, -1) if axis == 0 else (-1, 1))
+
+
+@task(returns=1)
+def _merge_reduced(f, axis, *partials):
+    return f(np.concatenate(partials, axis=axis), axis=axis, keepdims=True)
+
+
+@task(returns=1)
+def _hstack_to_subset(sparse, transposed, *blocks):
+    if transposed:
+        blocks = [_transpose(block) for block in blocks]
+
+    if sparse:
+        samples = sp.hstack(blocks, format="csr")
+    else:
+        samples = np.hstack(blocks)
+
+    return Subset(samples, copy=False)
@@ -1,11 +1,20 @@
+import json
 import os
+import struct
+import warnings
+import zipfile
+from functools import partial
+from io import BytesIO
 
 import numpy as np
+from numpy.lib import format
 from pycompss.api.parameter import FILE_IN
 from pycompss.api.task import task
-from scipy.sparse import issparse
+from scipy.sparse import issparse, csr_matrix
 
-from dislib.data import Subset, Dataset
+from dislib.data import Subset, Dataset, LazySubset
+from dislib.data.classes import SubsetStats, _FORMAT_NAME, _MANIFEST_FILE, \
+    _STATS_FILE, _subset_file
 
 
 def load_data(x, subset_size, y=None):
@@ -34,12 +43,13 @@ def load_data(x, subset_size, y=None):
             subset = Subset(x[i: i + subset_size], y[i: i + subset_size])
         else:
             subset = Subset(x[i: i + subset_size])
-        dataset.append(subset)
+        dataset.append(subset, subset.samples.shape[0])
 
     return dataset
 
 
-def load_libsvm_file(path, subset_size, n_features, store_sparse=True):
+def load_libsvm_file(path, subset_size, n_features, store_sparse=True,
+                     subset_bytes=None, lazy=False, cache_bytes=0):
     """ Loads a LibSVM file into a Dataset.
 
      Parameters
@@ -53,6 +63,19 @@ def load_libsvm_file(path, subset_size, n_features, store_sparse=True):
     store_sparse : boolean, optional (default = True).
         Whether to use scipy.sparse data structures to store data. If False,
         numpy.array is used instead.
+    subset_bytes : int, optional (default=None)
+        Approximate subset size in bytes. If set, the file is split in byte
+        ranges aligned to line boundaries, and each range is read and parsed
+        by a separate task. In this mode, the master process does not read
+        the file contents, path must be accessible from all the workers, and
+        subset_size is ignored.
+    lazy : boolean, optional (default=False)
+        Whether to build the Dataset with LazySubset instances, which only
+        read and parse their part of the file inside the tasks that use them.
+        In this mode, path must be accessible from all the workers.
+    cache_bytes : int, optional (default=0)
+        Size in bytes of the cache of loaded blocks of each worker process.
+        Only used if lazy is True.
 
     Returns
     -------
@@ -63,7 +86,8 @@ def load_libsvm_file(path, subset_size, n_features, store_sparse=True):
 
     return _load_file(path, subset_size, fmt="libsvm",
                       store_sparse=store_sparse,
-                      n_features=n_features)
+                      n_features=n_features, subset_bytes=subset_bytes,
+                      lazy=lazy, cache_bytes=cache_bytes)
 
 
 def load_libsvm_files(path, n_features, store_sparse=True):
@@ -91,7 +115,8 @@ def load_libsvm_files(path, n_features, store_sparse=True):
 
 
 def load_txt_file(path, subset_size, n_features, delimiter=",",
-                  label_col=None):
+                  label_col=None, subset_bytes=None, dtype=np.float64,
+                  lazy=False, cache_bytes=0):
     """ Loads a text file into a Dataset.
 
      Parameters
@@ -106,6 +131,21 @@ def load_txt_file(path, subset_size, n_features, delimiter=",",
         String that separates features in the file.
     label_col : int, optional (default=None)
         Column representing data labels. Can be 'first' or 'last'.
+    subset_bytes : int, optional (default=None)
+        Approximate subset size in bytes. If set, the file is split in byte
+        ranges aligned to line boundaries, and each range is read and parsed
+        by a separate task. In this mode, the master process does not read
+        the file contents, path must be accessible from all the workers, and
+        subset_size is ignored.
+    dtype : data-type, optional (default=np.float64)
+        Data type of the samples and labels (e.g., np.float32).
+    lazy : boolean, optional (default=False)
+        Whether to build the Dataset with LazySubset instances, which only
+        read and parse their part of the file inside the tasks that use them.
+        In this mode, path must be accessible from all the workers.
+    cache_bytes : int, optional (default=0)
+        Size in bytes of the cache of loaded blocks of each worker process.
+        Only used if lazy is True.
 
     Returns
     -------
@@ -114,10 +154,13 @@ def load_txt_file(path, subset_size, n_features, delimiter=",",
         subset_size.
     """
     return _load_file(path, subset_size, fmt="txt", n_features=n_features,
-                      delimiter=delimiter, label_col=label_col)
+                      delimiter=delimiter, label_col=label_col,
+                      subset_bytes=subset_bytes, dtype=dtype, lazy=lazy,
+                      cache_bytes=cache_bytes)
 
 
-def load_txt_files(path, n_features, delimiter=",", label_col=None):
+def load_txt_files(path, n_features, delimiter=",", label_col=None,
+                   dtype=np.float64):
     """ Loads a set of text files into a Dataset.
 
     Parameters
@@ -130,6 +173,8 @@ def load_txt_files(path, n_features, delimiter=",", label_col=None):
         String that separates features in the file.
     label_col : int, optional (default=None)
         Column representing data labels. Can be 'first' or 'last'.
+    dtype : data-type, optional (default=np.float64)
+        Data type of the samples and labels (e.g., np.float32).
 
    Returns
    -------
@@ -139,11 +184,189 @@ def load_txt_files(path, n_features, delimiter=",", label_col=None):
    """
 
     return _load_files(path, fmt="txt", n_features=n_features,
-                       delimiter=delimiter, label_col=label_col)
+                       delimiter=delimiter, label_col=label_col, dtype=dtype)
+
+
+def load_npy_file(path, subset_size, labels_path=None, lazy=False,
+                  cache_bytes=0):
+    """ Loads a .npy file into a Dataset.
+
+    Each Subset is read by a separate task that memory-maps the file and only
+    reads its own range of rows. Thus, the master process only reads the
+    header of the file, and path must be accessible from all the workers.
+
+    Parameters
+    ----------
+    path : string
+        Path of a .npy file containing a 2-d array of samples.
+    subset_size : int
+        Subset size in number of samples.
+    labels_path : string, optional (default=None)
+        Path of a .npy file containing a 1-d array of labels.
+    lazy : boolean, optional (default=False)
+        Whether to build the Dataset with LazySubset instances, which only
+        read and parse their part of the file inside the tasks that use them.
+        In this mode, path must be accessible from all the workers.
+    cache_bytes : int, optional (default=0)
+        Size in bytes of the cache of loaded blocks of each worker process.
+        Only used if lazy is True.
+
+    Returns
+    -------
+    dataset : Dataset
+        A distributed representation of the data divided in Subsets of
+        subset_size.
+    """
+    labels_file = None
+
+    if labels_path is not None:
+        labels_file = _NpyFile(labels_path)
+
+    return _load_npy(_NpyFile(path), subset_size, labels_file, lazy,
+                     cache_bytes)
+
+
+def load_npz_file(path, subset_size, samples_key="x", labels_key=None,
+                  lazy=False, cache_bytes=0):
+    """ Loads the arrays stored in a .npz file into a Dataset.
+
+    The .npz file must not be compressed (i.e., it must be created with
+    numpy.savez and not with numpy.savez_compressed), so that the arrays can
+    be memory-mapped. See load_npy_file for more details.
+
+    Parameters
+    ----------
+    path : string
+        Path of a .npz file.
+    subset_size : int
+        Subset size in number of samples.
+    samples_key : string, optional (default="x")
+        Name of the 2-d array of samples in the .npz file.
+    labels_key : string, optional (default=None)
+        Name of the 1-d array of labels in the .npz file.
+    lazy : boolean, optional (default=False)
+        Whether to build the Dataset with LazySubset instances, which only
+        read and parse their part of the file inside the tasks that use them.
+        In this mode, path must be accessible from all the workers.
+    cache_bytes : int, optional (default=0)
+        Size in bytes of the cache of loaded blocks of each worker process.
+        Only used if lazy is True.
+
+    Returns
+    -------
+    dataset : Dataset
+        A distributed representation of the data divided in Subsets of
+        subset_size.
+    """
+    labels_file = None
+
+    if labels_key is not None:
+        labels_file = _NpyFile(path, labels_key)
+
+    return _load_npy(_NpyFile(path, samples_key), subset_size, labels_file,
+                     lazy, cache_bytes)
+
+
+def load(path, lazy=False, cache_bytes=0):
+    """ Loads a Dataset saved with Dataset.save.
+
+    Samples are memory-mapped in copy-on-write mode by one task per Subset,
+    so no parsing is needed. The sizes and statistics of the Subsets are
+    read from the saved metadata.
+
+    Parameters
+    ----------
+    path : str
+        Directory where the Dataset was saved.
+    lazy : boolean, optional (default=False)
+        Whether to build the Dataset with LazySubset instances, which only
+        read their files inside the tasks that use them.
+    cache_bytes : int, optional (default=0)
+        Size in bytes of the cache of loaded blocks of each worker process.
+        Only used if lazy is True. Cached blocks are read into memory instead
+        of being memory-mapped.
+
+    Returns
+    -------
+    dataset : Dataset
+        A distributed representation of the data with the same Subsets as
+        the saved Dataset.
+    """
+    with open(os.path.join(path, _MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != _FORMAT_NAME:
+        raise ValueError("%s does not contain a saved Dataset." % path)
+
+    n_features = manifest["n_features"]
+    sparse = manifest["sparse"]
+    stats = np.load(os.path.join(path, _STATS_FILE))
+    dataset = Dataset(n_features, sparse)
+
+    for index, info in enumerate(manifest["subsets"]):
+        if lazy:
+            mmap_mode = None if cache_bytes > 0 else "c"
+            loader = partial(_read_saved_subset, path, index, sparse,
+                             n_features, info["labels"], mmap_mode)
+            key = _lazy_key(path, manifest.get("token"), index)
+            subset = LazySubset(loader, key, cache_bytes)
+        else:
+            subset = _load_saved_subset(path, index, sparse, n_features,
+                                        info["labels"])
+
+        min_, max_, sum_, m2 = stats[index]
+        subset_stats = SubsetStats(info["n_samples"], info["nnz"], min_, max_,
+                                   sum_, m2)
+        dataset.append(subset, info["n_samples"], subset_stats)
+
+    return dataset
+
+
+def _load_npy(samples_file, subset_size, labels_file, lazy=False,
+              cache_bytes=0):
+    shape = samples_file.get_shape()
+
+    if len(shape) != 2:
+        raise ValueError("Cannot read 2D array from the samples file.")
+
+    if labels_file is not None and labels_file.get_shape() != shape[:1]:
+        raise ValueError("Labels must be a 1D array with one label per "
+                         "sample.")
+
+    n_samples, n_features = shape
+    dataset = Dataset(n_features)
+
+    for start in range(0, n_samples, subset_size):
+        end = min(start + subset_size, n_samples)
+
+        if lazy:
+            loader = partial(_load_npy_rows, samples_file, labels_file, start,
+                             end)
+            key = _lazy_key(samples_file.path, samples_file.member,
+                            labels_file and labels_file.path,
+                            labels_file and labels_file.member, start, end)
+            dataset.append(LazySubset(loader, key, cache_bytes), end - start)
+            continue
+
+        subset, stats = _read_npy_range(samples_file, labels_file, start,
+                                        end)
+        dataset.append(subset, end - start, stats)
+
+    return dataset
 
 
 def _load_file(path, subset_size, fmt, n_features, delimiter=None,
-               label_col=None, store_sparse=False):
+               label_col=None, store_sparse=False, subset_bytes=None,
+               dtype=np.float64, lazy=False, cache_bytes=0):
+    if lazy:
+        return _load_file_lazy(path, subset_size, fmt, n_features, delimiter,
+                               label_col, store_sparse, subset_bytes, dtype,
+                               cache_bytes)
+
+    if subset_bytes is not None:
+        return _load_file_ranges(path, subset_bytes, fmt, n_features,
+                                 delimiter, label_col, store_sparse, dtype)
+
     lines = []
     dataset = Dataset(n_features, store_sparse)
 
@@ -152,20 +375,149 @@ def _load_file(path, subset_size, fmt, n_features, delimiter=None,
             lines.append(line.encode())
 
             if len(lines) == subset_size:
-                subset = _read_lines(lines, fmt, n_features, delimiter,
-                                     label_col, store_sparse)
-                dataset.append(subset)
+                subset, size, stats = _read_lines(lines, fmt, n_features,
+                                                  delimiter, label_col,
+                                                  store_sparse, dtype)
+                dataset.append(subset, size, stats)
                 lines = []
 
     if lines:
-        dataset.append(_read_lines(lines, fmt, n_features, delimiter,
-                                   label_col, store_sparse))
+        subset, size, stats = _read_lines(lines, fmt, n_features, delimiter,
+                                          label_col, store_sparse, dtype)
+        dataset.append(subset, size, stats)
+
+    return dataset
+
+
+def _load_file_ranges(path, subset_bytes, fmt, n_features, delimiter,
+                      label_col, store_sparse, dtype):
+    assert subset_bytes > 0, "subset_bytes must be greater than 0."
+
+    dataset = Dataset(n_features, store_sparse)
+    offsets = _trim_blank_tail(path, _get_line_offsets(path, subset_bytes))
+
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        subset, size, stats = _read_range(path, start, end, fmt, n_features,
+                                          delimiter, label_col, store_sparse,
+                                          dtype)
+        dataset.append(subset, size, stats)
 
     return dataset
 
 
+def _load_file_lazy(path, subset_size, fmt, n_features, delimiter,
+                    label_col, store_sparse, subset_bytes, dtype,
+                    cache_bytes):
+    dataset = Dataset(n_features, store_sparse)
+
+    if subset_bytes is not None:
+        assert subset_bytes > 0, "subset_bytes must be greater than 0."
+        offsets = _get_line_offsets(path, subset_bytes)
+    else:
+        offsets = _get_subset_offsets(path, subset_size)
+
+    offsets = _trim_blank_tail(path, offsets)
+
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        loader = partial(_load_range, path, start, end, fmt, n_features,
+                         delimiter, label_col, store_sparse, dtype)
+        key = _lazy_key(path, start, end, fmt, n_features, delimiter,
+                        label_col, store_sparse, np.dtype(dtype).str)
+        dataset.append(LazySubset(loader, key, cache_bytes))
+
+    return dataset
+
+
+def _lazy_key(path, *args):
+    """
+    Returns the key that identifies a block of path in the caches of the
+    workers. The modification time and size of path are part of the key so
+    that blocks of a file that is later overwritten are not reused.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size) + args
+
+
+def _get_subset_offsets(path, subset_size):
+    """
+    Returns the byte offsets of the beginning of every subset_size lines,
+    and the file size.
+    """
+    offsets = [0]
+
+    with open(path, "rb") as f:
+        for index, _ in enumerate(f, 1):
+            if index % subset_size == 0:
+                offsets.append(f.tell())
+
+    file_size = os.path.getsize(path)
+
+    if offsets[-1] < file_size:
+        offsets.append(file_size)
+
+    return offsets
+
+
+def _get_line_offsets(path, subset_bytes):
+    """
+    Returns the byte offsets that split the file in ranges of approximately
+    subset_bytes bytes. Each offset (except the last one, which is the file
+    size) points to the beginning of a line.
+    """
+    file_size = os.path.getsize(path)
+    offsets = [0]
+
+    with open(path, "rb") as f:
+        while offsets[-1] < file_size:
+            # move to the end of the line that contains the approximate
+            # boundary, so that ranges never split a line
+            f.seek(offsets[-1] + subset_bytes)
+            f.readline()
+            offsets.append(min(f.tell(), file_size))
+
+    return offsets
+
+
+_TAIL_CHUNK_BYTES = 2 ** 16
+
+
+def _trim_blank_tail(path, offsets):
+    """
+    Removes the ranges at the end of the file that only contain whitespace
+    (e.g., trailing newlines), which would be parsed into empty Subsets.
+    Only the trailing whitespace of the file is read.
+    """
+    data_end = _get_data_end(path)
+
+    while len(offsets) > 1 and offsets[-2] >= data_end:
+        del offsets[-2]
+
+    return offsets
+
+
+def _get_data_end(path):
+    """
+    Returns the byte offset that follows the last character of the file
+    that is not whitespace.
+    """
+    end = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        while end > 0:
+            start = max(end - _TAIL_CHUNK_BYTES, 0)
+            f.seek(start)
+            data = f.read(end - start).rstrip()
+
+            if data:
+                return start + len(data)
+
+            end = start
+
+    return 0
+
+
 def _load_files(path, fmt, n_features, delimiter=None, label_col=None,
-                store_sparse=False):
+                store_sparse=False, dtype=np.float64):
     assert os.path.isdir(path), "Path is not a directory."
 
     files = os.listdir(path)
@@ -173,32 +525,236 @@ def _load_files(path, fmt, n_features, delimiter=None, label_col=None,
 
     for file_ in files:
         full_path = os.path.join(path, file_)
-        subset = _read_file(full_path, fmt, n_features, delimiter, label_col,
-                            store_sparse)
-        subsets.append(subset)
+        subset, size, stats = _read_file(full_path, fmt, n_features,
+                                         delimiter, label_col, store_sparse,
+                                         dtype)
+        subsets.append(subset, size, stats)
 
     return subsets
 
 
-@task(returns=1)
-def _read_lines(lines, fmt, n_features, delimiter, label_col, store_sparse):
+@task(returns=3)
+def _read_lines(lines, fmt, n_features, delimiter, label_col, store_sparse,
+                dtype):
     if fmt == "libsvm":
         subset = _read_libsvm(lines, n_features, store_sparse)
     else:
-        samples = np.genfromtxt(lines, delimiter=delimiter)
+        subset = _read_txt(b"".join(lines), delimiter, label_col, dtype)
+
+    return _with_metadata(subset)
+
+
+@task(returns=3)
+def _read_range(path, start, end, fmt, n_features, delimiter, label_col,
+                store_sparse, dtype):
+    subset = _load_range(path, start, end, fmt, n_features, delimiter,
+                         label_col, store_sparse, dtype)
+    return _with_metadata(subset)
+
+
+def _load_range(path, start, end, fmt, n_features, delimiter, label_col,
+                store_sparse, dtype):
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start)
+
+    if not text.strip():
+        # a range in the middle of the file with only blank lines
+        return _empty_subset(fmt, n_features, label_col, store_sparse,
+                             dtype)
+
+    if fmt == "libsvm":
+        lines = text.splitlines(keepends=True)
+        subset = _read_libsvm(lines, n_features, store_sparse)
+    else:
+        subset = _read_txt(text, delimiter, label_col, dtype)
+
+    return subset
+
+
+def _empty_subset(fmt, n_features, label_col, store_sparse, dtype):
+    if fmt == "libsvm":
+        samples = csr_matrix((0, n_features)) if store_sparse else \
+            np.empty((0, n_features))
+        return Subset(samples, np.empty(0), copy=False)
+
+    labels = np.empty(0, dtype) if label_col is not None else None
+
+    return Subset(np.empty((0, n_features), dtype), labels, copy=False)
+
+
+@task(returns=2)
+def _read_npy_range(samples_file, labels_file, start, end):
+    subset = _load_npy_rows(samples_file, labels_file, start, end)
+    return subset, SubsetStats.from_samples(subset.samples)
+
+
+def _load_npy_rows(samples_file, labels_file, start, end):
+    samples = samples_file.memmap()[start:end]
+    labels = None
+
+    # labels are copied because they can be modified later (e.g., by
+    # Subset.set_label), while samples are kept memory-mapped
+    if labels_file is not None:
+        labels = np.array(labels_file.memmap()[start:end])
+
+    return Subset(samples, labels, copy=False)
+
+
+@task(returns=1)
+def _load_saved_subset(path, index, sparse, n_features, has_labels):
+    return _read_saved_subset(path, index, sparse, n_features, has_labels,
+                              mmap_mode="c")
 
-        if label_col == "first":
-            subset = Subset(samples[:, 1:], samples[:, 0])
-        elif label_col == "last":
-            subset = Subset(samples[:, :-1], samples[:, -1])
-        else:
-            subset = Subset(samples)
+
+def _read_saved_subset(path, index, sparse, n_features, has_labels,
+                       mmap_mode):
+    def load_array(name):
+        return np.load(_subset_file(path, index, name), mmap_mode=mmap_mode)
+
+    if sparse:
+        data, indices, indptr = map(load_array, ("data", "indices", "indptr"))
+        shape = (indptr.shape[0] - 1, n_features)
+        samples = csr_matrix((data, indices, indptr), shape=shape, copy=False)
+    else:
+        samples = load_array("samples")
+
+    labels = None
+
+    if has_labels:
+        labels = np.load(_subset_file(path, index, "labels"))
+
+    return Subset(samples, labels, copy=False)
+
+
+def _with_metadata(subset):
+    """ Returns subset together with its number of samples and statistics,
+    so that loaders can fill the metadata of the Dataset. """
+    samples = subset.samples
+    return subset, samples.shape[0], SubsetStats.from_samples(samples)
+
+
+def _read_txt(text, delimiter, label_col, dtype):
+    samples = _parse_delimited(text, delimiter, dtype)
+
+    if samples is None:
+        # missing or non-numeric fields, which genfromtxt fills with NaN
+        samples = np.genfromtxt(BytesIO(text), delimiter=delimiter,
+                                dtype=dtype)
+
+        # genfromtxt returns a 1-d array if there is a single line (e.g., at
+        # the end of a byte range)
+        if samples.ndim == 1:
+            n_lines = sum(1 for line in text.splitlines() if line.strip())
+            samples = samples.reshape(n_lines, -1)
+
+    if label_col == "first":
+        subset = Subset(samples[:, 1:], samples[:, 0], copy=False)
+    elif label_col == "last":
+        subset = Subset(samples[:, :-1], samples[:, -1], copy=False)
+    else:
+        subset = Subset(samples, copy=False)
 
     return subset
 
 
-@task(file=FILE_IN, returns=1)
-def _read_file(file, fmt, n_features, delimiter, label_col, store_sparse):
+def _parse_delimited(text, delimiter, dtype):
+    """ Parses bytes with one sample per line into a 2-dimensional array
+    of the given dtype. All the fields are converted by a single call to
+    np.fromstring. Returns None if the text cannot be parsed this way (e.g.,
+    because of missing values or non-numeric fields).
+    """
+    if b"\r" in text:
+        text = text.replace(b"\r\n", b"\n")
+
+    # empty fields make fromstring fail, but only after parsing the whole
+    # text
+    if delimiter is not None and delimiter.strip() and \
+            _has_empty_fields(text, delimiter.encode()):
+        return None
+
+    text = text.strip()
+
+    if not text:
+        return np.empty((0, 0), dtype=dtype)
+
+    n_rows = text.count(b"\n") + 1
+    first_line = text[:text.find(b"\n")] if n_rows > 1 else text
+
+    if delimiter is None or not delimiter.strip():
+        # fromstring treats any run of whitespace as a separator
+        n_cols = len(first_line.split())
+        sep = " "
+    else:
+        n_cols = first_line.count(delimiter.encode()) + 1
+        sep = delimiter
+
+    # fromstring ignores line breaks, so lines with a different number of
+    # fields would be silently merged into wrong rows
+    if np.any(_fields_per_line(text, delimiter) != n_cols):
+        return None
+
+    if sep != " ":
+        text = text.replace(b"\n", delimiter.encode())
+
+    with warnings.catch_warnings():
+        # fromstring warns (and will raise) when a field is empty or is not
+        # a number
+        warnings.simplefilter("error", DeprecationWarning)
+
+        try:
+            values = np.fromstring(text, dtype=dtype, sep=sep)
+        except (ValueError, DeprecationWarning):
+            return None
+
+    if values.size != n_rows * n_cols:
+        return None
+
+    return values.reshape(n_rows, n_cols)
+
+
+def _has_empty_fields(text, delim):
+    return text.startswith(delim) or text.endswith(delim) or \
+        delim + delim in text or delim + b"\n" in text or \
+        b"\n" + delim in text
+
+
+def _fields_per_line(text, delimiter):
+    """ Returns the number of fields of each line of text, where fields are
+    separated by delimiter, or by runs of whitespace if delimiter is None or
+    whitespace.
+    """
+    if delimiter is not None and delimiter.strip() and len(delimiter) > 1:
+        delimiter = delimiter.encode()
+        return np.array([line.count(delimiter) + 1
+                         for line in text.split(b"\n")])
+
+    data = np.frombuffer(text, dtype=np.uint8)
+    newlines = data == ord("\n")
+
+    if delimiter is None or not delimiter.strip():
+        blank = np.isin(data, np.frombuffer(b" \t\v\f\r", dtype=np.uint8))
+        blank |= newlines
+        # count the first character of every field
+        marks = ~blank
+        marks[1:] &= blank[:-1]
+        return _count_per_line(marks, newlines)
+
+    return _count_per_line(data == ord(delimiter), newlines) + 1
+
+
+def _count_per_line(marks, newlines):
+    """ Returns the number of True values of marks in each line, where lines
+    end at the True values of newlines. """
+    positions = np.flatnonzero(marks)
+    line_ends = np.searchsorted(positions, np.flatnonzero(newlines))
+
+    return np.diff(line_ends, prepend=0, append=positions.size)
+
+
+@task(file=FILE_IN, returns=3)
+def _read_file(file, fmt, n_features, delimiter, label_col, store_sparse,
+               dtype):
     from sklearn.datasets import load_svmlight_file
 
     if fmt == "libsvm":
@@ -207,18 +763,12 @@ def _read_file(file, fmt, n_features, delimiter, label_col, store_sparse):
         if not store_sparse:
             x = x.toarray()
 
-        subset = Subset(x, y)
+        subset = Subset(x, y, copy=False)
     else:
-        samples = np.genfromtxt(file, delimiter=delimiter)
+        with open(file, "rb") as f:
+            subset = _read_txt(f.read(), delimiter, label_col, dtype)
 
-        if label_col == "first":
-            subset = Subset(samples[:, 1:], samples[:, 0])
-        elif label_col == "last":
-            subset = Subset(samples[:, :-1], samples[:, -1])
-        else:
-            subset = Subset(samples)
-
-    return subset
+    return _with_metadata(subset)
 
 
 def _read_libsvm(lines, n_features, store_sparse):
@@ -234,5 +784,81 @@ def _read_libsvm(lines, n_features, store_sparse):
     if not store_sparse:
         x = x.toarray()
 
-    data = Subset(x, y)
+    data = Subset(x, y, copy=False)
     return data
+
+
+class _NpyFile(object):
+    """ Header information of a .npy file, or of an array stored in an
+    uncompressed .npz file if member is not None.
+    """
+
+    def __init__(self, path, member=None):
+        self.path = path
+        self.member = member
+
+        self.shape = None
+        self.fortran_order = None
+        self.dtype = None
+        self.offset = None
+
+    def get_shape(self):
+        if self.shape is None:
+            self._read_header()
+        return self.shape
+
+    def get_fortran_order(self):
+        if self.fortran_order is None:
+            self._read_header()
+        return self.fortran_order
+
+    def get_dtype(self):
+        if self.dtype is None:
+            self._read_header()
+        return self.dtype
+
+    def get_offset(self):
+        if self.offset is None:
+            self._read_header()
+        return self.offset
+
+    def memmap(self):
+        """ Returns a read-only memory-mapped array backed by the file. """
+        dtype = self.get_dtype()
+
+        if dtype.hasobject:
+            raise ValueError("Cannot memory-map arrays of Python objects.")
+
+        order = "F" if self.get_fortran_order() else "C"
+        return np.memmap(self.path, dtype=dtype, mode="r",
+                         offset=self.get_offset(), shape=self.get_shape(),
+                         order=order)
+
+    def _read_header(self):
+        with open(self.path, 'rb') as fp:
+            if self.member is not None:
+                fp.seek(self._get_member_offset())
+
+            version = format.read_magic(fp)
+            try:
+                format._check_version(version)
+            except ValueError:
+                raise ValueError('Invalid file format.')
+            header_data = format._read_array_header(fp, version)
+            self.shape, self.fortran_order, self.dtype = header_data
+            self.offset = fp.tell()
+
+    def _get_member_offset(self):
+        with zipfile.ZipFile(self.path) as zf:
+            info = zf.getinfo(self.member + ".npy")
+
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError("Cannot memory-map compressed .npz files.")
+
+        # the data of a zip member starts after its local file header, which
+        # has a fixed size of 30 bytes plus the file name and an extra field
+        with open(self.path, 'rb') as fp:
+            fp.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", fp.read(4))
+
+        return info.header_offset + 30 + name_len + extra_len
@@ -1,3 +1,9 @@
+import json
+import os
+from collections import OrderedDict
+from functools import partial
+from uuid import uuid4
+
 import numpy as np
 import scipy.sparse as sp
 from pycompss.api.api import compss_wait_on
@@ -36,6 +42,9 @@ class Dataset(object):
         self._subsets = list()
         self.n_features = n_features
         self._sizes = list()
+        self._stats = list()
+        self._total_stats = None
+        self._n_merged_stats = 0
         self._max_features = None
         self._min_features = None
         self._samples = None
@@ -51,7 +60,7 @@ class Dataset(object):
     def __iter__(self):
         return self._subsets.__iter__()
 
-    def append(self, subset, n_samples=None):
+    def append(self, subset, n_samples=None, stats=None):
         """ Appends a Subset to this Dataset.
 
         Parameters
@@ -60,9 +69,13 @@ class Dataset(object):
             Subset to add to this Dataset.
         n_samples : int, optional (default=None)
             Number of samples in subset.
+        stats : SubsetStats, optional (default=None)
+            Statistics of the samples in subset. If None, they are computed
+            when needed.
         """
         self._subsets.append(subset)
         self._sizes.append(n_samples)
+        self._stats.append(stats)
         self._reset_attributes()
 
     def extend(self, subsets):
@@ -75,11 +88,18 @@ class Dataset(object):
         """
         self._subsets.extend(subsets)
         self._sizes.extend([None] * len(subsets))
+        self._stats.extend([None] * len(subsets))
         self._reset_attributes()
 
     def transpose(self, n_subsets=None):
         """ Transposes the Dataset.
 
+        As a Dataset is only divided by rows, samples are exchanged between
+        Subsets: each input Subset is split in groups of columns by one task,
+        and each output Subset stacks its groups in another task. Thus, the
+        number of tasks grows linearly with the number of Subsets. Use
+        to_array().transpose() to transpose without running any task.
+
         Parameters
         ----------
         n_subsets : int, optional (default=None)
@@ -95,23 +115,142 @@ class Dataset(object):
         if n_subsets is None:
             n_subsets = len(self._subsets)
 
-        subsets_t = []
-        for i in range(n_subsets):
-            subsets_i = [_get_split_i(s, i, n_subsets) for s in self._subsets]
-            new_subset = _merge_split_subsets(self.sparse, *subsets_i)
-            subsets_t.append(new_subset)
+        # each input subset emits all its groups of columns from a single
+        # task, and each output subset merges only its own groups
+        stride = self.n_features // n_subsets
+        bounds = [i * stride for i in range(n_subsets)] + [self.n_features]
+        splits = []
+
+        for subset in self._subsets:
+            groups = _split_cols(subset, bounds, n_subsets)
+
+            if n_subsets == 1:
+                groups = [groups]
+
+            splits.append(groups)
 
         n_rows = np.sum(self.subsets_sizes())
 
         dataset_t = Dataset(n_features=n_rows, sparse=self._sparse)
 
-        dataset_t.extend(subsets_t)
+        for i in range(n_subsets):
+            groups_i = [groups[i] for groups in splits]
+            new_subset = _merge_split_subsets(self._sparse, *groups_i)
+            dataset_t.append(new_subset, bounds[i + 1] - bounds[i])
 
         return dataset_t
 
+    def to_array(self, col_block_size=None):
+        """ Converts the samples of this Dataset to an Array with one row
+        of blocks per Subset. Labels are not included in the Array.
+
+        Parameters
+        ----------
+        col_block_size : int, optional (default=None)
+            Number of columns of the blocks. If None, each Subset becomes a
+            single block.
+
+        Returns
+        -------
+        array : Array
+        """
+        from dislib.data.array import Array
+
+        if col_block_size is None:
+            col_block_size = self.n_features
+
+        bounds = list(range(0, self.n_features, col_block_size))
+        bounds.append(self.n_features)
+        n_blocks = len(bounds) - 1
+        blocks = []
+
+        for subset in self._subsets:
+            row = _split_cols(subset, bounds, n_blocks)
+
+            if n_blocks == 1:
+                row = [row]
+
+            blocks.append(list(row))
+
+        col_sizes = np.diff(bounds).tolist()
+
+        return Array(blocks, self.subsets_sizes(), col_sizes, self._sparse)
+
+    def map_blocks(self, f, return_dataset=True, n_features=None,
+                   sparse=None):
+        """ Applies a function to the samples and labels of each Subset. The
+        function is applied once per Subset in a single task.
+
+        Parameters
+        ----------
+        f : function
+            Function with signature f(samples, labels), where samples is the
+            ndarray or sparse matrix of a Subset and labels are its labels
+            (or None). If return_dataset is True, f must return an array of
+            samples or a (samples, labels) tuple. Otherwise, f can return any
+            object.
+        return_dataset : boolean, optional (default=True)
+            Whether to return the results as a Dataset.
+        n_features : int, optional (default=None)
+            Number of features of the returned Dataset. Defaults to the number
+            of features of this Dataset. Ignored if return_dataset is False.
+        sparse : boolean, optional (default=None)
+            Whether the returned Dataset is sparse. Defaults to the value of
+            this Dataset. Ignored if return_dataset is False.
+
+        Returns
+        -------
+        result : Dataset or list
+            A Dataset with one Subset per Subset in this Dataset, or a list
+            with the (possibly future) results of f on each Subset.
+        """
+        if not return_dataset:
+            return [_map_block(subset, f) for subset in self._subsets]
+
+        if n_features is None:
+            n_features = self.n_features
+
+        if sparse is None:
+            sparse = self._sparse
+
+        dataset = Dataset(n_features=n_features, sparse=sparse)
+
+        for subset in self._subsets:
+            new_subset, n_samples = _map_subset(subset, f)
+            dataset.append(new_subset, n_samples)
+
+        return dataset
+
+    def tree_reduce(self, map_f, combine_f, arity=None):
+        """ Applies a function to each Subset and reduces the results with a
+        balanced tree of tasks.
+
+        Parameters
+        ----------
+        map_f : function
+            Function with signature map_f(samples, labels) that returns the
+            partial result of a Subset.
+        combine_f : function
+            Function with signature combine_f(*partials) that combines several
+            partial results, in order, into a single one.
+        arity : int, optional (default=None)
+            Maximum number of partial results combined by each task. If None,
+            it is chosen from the number of Subsets.
+
+        Returns
+        -------
+        result : object
+            The (possibly future) result of the reduction.
+        """
+        partials = self.map_blocks(map_f, return_dataset=False)
+
+        return tree_reduce(partials, partial(_combine, combine_f), arity)
+
     def _apply(self, f, sparse=None, return_dataset=False):
         """ Returns the result of applying function f to each sample of the
-         dataset.
+        dataset. This method calls f once per sample; use map_blocks to
+        process whole Subsets instead.
+
         Parameters
         ----------
         f : function
@@ -128,25 +267,17 @@ class Dataset(object):
         result : Dataset / list
             Result of applying f to each of the dataset's samples.
         """
+        block_f = partial(_apply_rows, f)
 
-        if sparse is None:
-            sparse = self._sparse
-
-        new_elems = []
-        for i in range(len(self)):
-            new_elems.append(_subset_apply(self._subsets[i], f,
-                                           return_subset=return_dataset))
+        if not return_dataset:
+            return self.map_blocks(block_f, return_dataset=False)
 
-        if return_dataset:
-            n_features = _subset_size(new_elems[0])
+        dataset = self.map_blocks(block_f, sparse=sparse)
 
-            dataset = Dataset(n_features=n_features, sparse=sparse)
+        if len(dataset) > 0:
+            dataset.n_features = _subset_n_features(dataset[0])
 
-            dataset.extend(new_elems)
-
-            return dataset
-        else:
-            return new_elems
+        return dataset
 
     def subset_size(self, index):
         """ Returns the number of samples in the Subset referenced by index.
@@ -201,7 +332,7 @@ class Dataset(object):
             the dataset.
         """
         if self._min_features is None:
-            self._compute_min_max()
+            self._update_min_max()
 
         return self._min_features
 
@@ -216,13 +347,115 @@ class Dataset(object):
             the dataset.
         """
         if self._max_features is None:
-            self._compute_min_max()
+            self._update_min_max()
 
         return self._max_features
 
+    def save(self, path):
+        """ Saves this Dataset in binary format to a directory, which can be
+        loaded back with dislib.data.load.
+
+        Each Subset is written by a separate task to .npy files: one file
+        with the samples if they are dense, or three files with the data,
+        indices and indptr arrays if they are sparse, and one file with the
+        labels. A manifest.json file with the number of features, the sparsity
+        and the sizes of the Subsets, and a stats.npy file with the statistics
+        of the Subsets are written as well. The manifest also contains a
+        unique token that identifies this save, so that Datasets lazily
+        loaded from an overwritten directory do not reuse cached Subsets.
+
+        Parameters
+        ----------
+        path : str
+            Directory where to save the dataset. It must be accessible by all
+            the workers (e.g., in a shared file system), and it is created if
+            it does not exist.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        has_labels = []
+
+        for index, subset in enumerate(self._subsets):
+            has_labels.append(_save_subset(subset, path, index))
+
+            if self._stats[index] is None:
+                self._stats[index] = _get_stats(subset)
+
+        has_labels = compss_wait_on(has_labels)
+        self._stats = compss_wait_on(self._stats)
+        sizes = self.subsets_sizes()
+
+        subsets = []
+
+        for size, labels, stats in zip(sizes, has_labels, self._stats):
+            subsets.append({"n_samples": int(size), "nnz": int(stats.nnz),
+                            "labels": labels})
+
+        stats = [[s.min, s.max, s.sum, s.m2] for s in self._stats]
+        np.save(os.path.join(path, _STATS_FILE),
+                np.array(stats, dtype=float).reshape(-1, 4, self.n_features))
+
+        manifest = {"format": _FORMAT_NAME, "version": _FORMAT_VERSION,
+                    "token": uuid4().hex,
+                    "n_features": int(self.n_features),
+                    "sparse": bool(self._sparse), "subsets": subsets}
+
+        with open(os.path.join(path, _MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def cache(self, path, cache_bytes=2 ** 30):
+        """ Returns a copy of this Dataset whose Subsets are kept in the
+        memory of the worker processes across tasks.
+
+        The Subsets are saved to path (see Dataset.save), and the returned
+        Dataset contains LazySubset instances that identify each Subset by its
+        path and index. Tasks receive these small descriptors instead of
+        serialized Subsets, and each worker process keeps the Subsets it
+        loads in an LRU cache of cache_bytes bytes. Thus, iterative
+        estimators that run tasks on the same Subsets in every iteration
+        (e.g., KMeans or GaussianMixture) only read each Subset once per
+        worker process as long as it fits in the cache.
+
+        Parameters
+        ----------
+        path : str
+            Directory where to save the Subsets. It must be accessible by all
+            the workers (e.g., in a shared file system).
+        cache_bytes : int, optional (default=2**30)
+            Size in bytes of the cache of each worker process.
+
+        Returns
+        -------
+        dataset : Dataset
+            Dataset with the same samples, labels, sizes and statistics as
+            this one.
+        """
+        from dislib.data.base import load
+
+        self.save(path)
+
+        return load(path, lazy=True, cache_bytes=cache_bytes)
+
     def collect(self):
         self._subsets = compss_wait_on(self._subsets)
 
+    def iter_blocks(self):
+        """ Iterates over the samples and labels of each Subset. Subsets are
+        synchronized one at a time, and the samples of different Subsets are
+        not concatenated.
+
+        Yields
+        ------
+        samples : ndarray
+            Samples of a Subset.
+        labels : ndarray
+            Labels of the Subset, or None if the Subset has no labels.
+        """
+        for index in range(len(self._subsets)):
+            subset = compss_wait_on(self._subsets[index])
+            self._subsets[index] = subset
+            yield subset.samples, subset.labels
+
     @property
     def labels(self):
         self._update_labels()
@@ -244,15 +477,43 @@ class Dataset(object):
         self._samples = None
         self._labels = None
 
-    def _compute_min_max(self):
-        minmax = []
+    def _reset_stats(self):
+        """ Discards the statistics of all the subsets. Must be called
+        after modifying the samples of the dataset in place. """
+        self._stats = [None] * len(self._subsets)
+        self._total_stats = None
+        self._n_merged_stats = 0
+        self._reset_attributes()
 
-        for subset in self._subsets:
-            minmax.append(_get_min_max(subset))
+    def _feature_stats(self, arity=None):
+        """ Returns the SubsetStats of all the samples in the dataset, which
+        might be a future object. Only the statistics of the subsets appended
+        since the last call are computed and merged.
+        """
+        partials = []
+
+        for index in range(self._n_merged_stats, len(self._subsets)):
+            if self._stats[index] is None:
+                self._stats[index] = _get_stats(self._subsets[index])
+
+            partials.append(self._stats[index])
+
+        if self._total_stats is not None:
+            partials.insert(0, self._total_stats)
+
+        if partials:
+            # min, max, sum and m2 of each feature
+            nbytes = 4 * 8 * self.n_features
+            self._total_stats = tree_reduce(partials, _merge_stats, arity,
+                                            nbytes)
 
-        minmax = compss_wait_on(minmax)
-        self._min_features = np.nanmin(minmax, axis=0)[0]
-        self._max_features = np.nanmax(minmax, axis=0)[1]
+        self._n_merged_stats = len(self._subsets)
+        return self._total_stats
+
+    def _update_min_max(self):
+        self._total_stats = compss_wait_on(self._feature_stats())
+        self._min_features = self._total_stats.min
+        self._max_features = self._total_stats.max
 
     def _update_labels(self):
         self.collect()
@@ -268,13 +529,100 @@ class Dataset(object):
     def _update_samples(self):
         self.collect()
         if len(self._subsets) > 0:
-            # use the first subset to init to keep the subset's dtype
-            self._samples = self._subsets[0].samples
+            samples = [subset.samples for subset in self._subsets]
+
+            if issparse(samples[0]):
+                self._samples = _vstack_sparse(samples)
+            else:
+                self._samples = _vstack_dense(samples)
+
+
+def tree_reduce(partials, combine_f, arity=None, partial_nbytes=None,
+                root_f=None):
+    """ Reduces a list of partial results with a balanced tree.
+
+    Partial results are recursively split in at most arity consecutive
+    groups of similar size, so that the order of the partial results is
+    preserved, every call to combine_f receives at least two partial results,
+    and the depths of the partial results in the tree differ by at most one.
+
+    Parameters
+    ----------
+    partials : list
+        Partial results, which can be future objects.
+    combine_f : function
+        Function that combines several partial results into a new partial
+        result, usually by launching a task. It is called as
+        combine_f(*group).
+    arity : int, optional (default=None)
+        Maximum number of partial results combined by each call to combine_f.
+        If None, it is chosen from the number of partial results and their
+        size.
+    partial_nbytes : int, optional (default=None)
+        Approximate size in bytes of a partial result. Used to limit the
+        amount of data combined by each task when arity is None.
+    root_f : function, optional (default=None)
+        Function called instead of combine_f to combine the last group of
+        partial results. If None, a single remaining partial result is
+        returned without calling combine_f.
+
+    Returns
+    -------
+    result : object
+        Result of the reduction, usually a future object.
+    """
+    partials = list(partials)
+
+    if arity is None:
+        arity = _choose_arity(len(partials), partial_nbytes)
+
+    assert arity > 1, "Arity must be greater than 1."
+    assert len(partials) > 0, "Cannot reduce an empty list."
+
+    if root_f is None:
+        return _reduce_subtree(partials, combine_f, arity)
+
+    children = [_reduce_subtree(group, combine_f, arity)
+                for group in _split_groups(partials, arity)]
+
+    return root_f(*children)
+
+
+def _reduce_subtree(partials, combine_f, arity):
+    if len(partials) == 1:
+        return partials[0]
+
+    children = [_reduce_subtree(group, combine_f, arity)
+                for group in _split_groups(partials, arity)]
+
+    return combine_f(*children)
+
+
+def _split_groups(partials, arity):
+    """ Splits partials in min(arity, len(partials)) consecutive groups
+    whose sizes differ by at most one. """
+    n_groups = min(arity, len(partials))
+    bounds = np.linspace(0, len(partials), n_groups + 1).astype(int)
+
+    return [partials[start:end]
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+_MIN_ARITY = 2
+_MAX_ARITY = 50
+_MAX_REDUCTION_BYTES = 2 ** 28
+
+
+def _choose_arity(n_partials, partial_nbytes):
+    """ Returns the square root of the number of partial results, which
+    gives a tree of two levels, limited so that each task does not combine
+    more than _MAX_REDUCTION_BYTES. """
+    arity = int(np.ceil(np.sqrt(n_partials)))
 
-            concat_f = sp.vstack if self._sparse else np.concatenate
+    if partial_nbytes:
+        arity = min(arity, _MAX_REDUCTION_BYTES // partial_nbytes)
 
-            for subset in self._subsets[1:]:
-                self._samples = concat_f((self._samples, subset.samples))
+    return int(np.clip(arity, _MIN_ARITY, _MAX_ARITY))
 
 
 class Subset(object):
@@ -286,6 +634,9 @@ class Subset(object):
         Array of shape (n_samples, n_features).
     labels : ndarray, optional
         Array of shape (n_samples)
+    copy : boolean, optional (default=True)
+        Whether to copy samples and labels. If False, the Subset references
+        the input arrays, which should not be modified afterwards.
 
     Attributes
     ----------
@@ -295,13 +646,18 @@ class Subset(object):
         Labels.
     """
 
-    def __init__(self, samples, labels=None):
-        self.samples = samples.copy()
+    def __init__(self, samples, labels=None, copy=True):
+        if copy:
+            self.samples = samples.copy()
+        else:
+            self.samples = samples
 
-        if labels is not None:
+        if labels is None:
+            self.labels = None
+        elif copy:
             self.labels = np.array(labels)
         else:
-            self.labels = None
+            self.labels = np.asarray(labels)
 
     def copy(self):
         """ Return a copy of this Subset
@@ -349,19 +705,377 @@ class Subset(object):
         Notes
         -----
         If the Subset does not contain labels, this method initializes all
-        labels different from ``index'' to ``None''.
+        labels different from ``index'' to NaN if ``label'' is a number, and
+        to ``None'' otherwise. Thus, numeric labels are stored as floats, so
+        that unset labels cannot be mistaken for real labels such as -1. The
+        dtype of the labels is upcast if ``label'' does not fit in it.
         """
+        dtype = _label_dtype(label)
+
         if self.labels is None:
-            self.labels = np.array([None] * self.samples.shape[0])
+            self.labels = _empty_labels(self.samples.shape[0], dtype)
+        elif not np.can_cast(dtype, self.labels.dtype):
+            dtype = np.result_type(self.labels.dtype, dtype)
+            self.labels = self.labels.astype(dtype)
 
         self.labels[index] = label
 
+    def set_labels(self, labels):
+        """ Sets the labels of all the samples. Integer labels are stored
+        with the smallest integer dtype that can hold them.
+
+        Parameters
+        ----------
+        labels : ndarray
+            Array of shape (n_samples) or (n_samples, n_outputs).
+        """
+        labels = np.asarray(labels)
+
+        assert labels.shape[0] == self.samples.shape[0], \
+            "The number of labels does not match the number of samples."
+
+        self.labels = _compact_labels(labels)
+
     def __getitem__(self, item):
+        # advanced indexing returns new arrays, while basic indexing (e.g.,
+        # with slices) returns views that need to be copied
+        samples = _copy_if_shared(self.samples[item], self.samples)
+        labels = None
+
         if self.labels is not None:
-            subset = Subset(self.samples[item], self.labels[item])
+            labels = _copy_if_shared(self.labels[item], self.labels)
+
+        return Subset(samples, labels, copy=False)
+
+
+class LazySubset(Subset):
+    """ A Subset whose samples and labels are loaded from a file when they
+    are first accessed.
+
+    LazySubset only stores a description of how to load the data (e.g., a
+    file path and a range of bytes or rows), so that the data is loaded
+    inside the tasks that access it and discarded when they finish, instead
+    of being kept in memory and transferred between processes. Loaded blocks
+    can be kept in a per-process LRU cache to avoid reading frequently used
+    blocks again.
+
+    Samples and labels that are assigned or modified (e.g., by set_label)
+    are stored in the LazySubset and are not loaded again.
+
+    Parameters
+    ----------
+    loader : callable
+        Picklable function without arguments that returns a Subset with the
+        data.
+    key : hashable, optional (default=None)
+        Identifier of the data in the cache. If None, the data is not
+        cached.
+    cache_bytes : int, optional (default=0)
+        Maximum number of bytes of the blocks kept in the cache of each
+        process. If 0, loaded data is not cached.
+    """
+
+    def __init__(self, loader, key=None, cache_bytes=0):
+        self._loader = loader
+        self._key = key
+        self._cache_bytes = cache_bytes
+        self._subset = None
+        self._samples = None
+        self._labels = None
+        self._labels_set = False
+
+    @property
+    def samples(self):
+        if self._samples is not None:
+            return self._samples
+
+        return self._load().samples
+
+    @samples.setter
+    def samples(self, samples):
+        self._samples = samples
+
+    @property
+    def labels(self):
+        if self._labels_set:
+            return self._labels
+
+        return self._load().labels
+
+    @labels.setter
+    def labels(self, labels):
+        self._labels = labels
+        self._labels_set = True
+
+    def set_label(self, index, label):
+        # loaded labels can be shared with the cache
+        if not self._labels_set and self.labels is not None:
+            self.labels = np.array(self.labels)
+
+        super(LazySubset, self).set_label(index, label)
+
+    def set_labels(self, labels):
+        # labels are replaced, so there is no need to load the stored ones
+        labels = np.asarray(labels)
+        self.labels = _compact_labels(labels)
+
+    def __getstate__(self):
+        # loaded data is never serialized
+        state = self.__dict__.copy()
+        state["_subset"] = None
+        return state
+
+    def _load(self):
+        if self._subset is None:
+            self._subset = _cache_get(self._key)
+
+        if self._subset is None:
+            self._subset = self._loader()
+
+            if self._key is not None and self._cache_bytes > 0:
+                _cache_put(self._key, self._subset, self._cache_bytes)
+
+        return self._subset
+
+
+# cache of LazySubset blocks of the current process in LRU order
+_block_cache = OrderedDict()
+
+
+def _cache_get(key):
+    if key is None or key not in _block_cache:
+        return None
+
+    _block_cache.move_to_end(key)
+    return _block_cache[key][0]
+
+
+def _cache_put(key, subset, max_bytes):
+    nbytes = _subset_nbytes(subset)
+
+    if nbytes > max_bytes:
+        return
+
+    _block_cache[key] = (subset, nbytes)
+    total = sum(entry[1] for entry in _block_cache.values())
+
+    while total > max_bytes:
+        _, (_, evicted) = _block_cache.popitem(last=False)
+        total -= evicted
+
+
+def _subset_nbytes(subset):
+    samples = subset.samples
+
+    if issparse(samples):
+        samples = sp.csr_matrix(samples)
+        nbytes = samples.data.nbytes + samples.indices.nbytes + \
+            samples.indptr.nbytes
+    else:
+        nbytes = samples.nbytes
+
+    if subset.labels is not None:
+        nbytes += subset.labels.nbytes
+
+    return nbytes
+
+
+class SubsetStats(object):
+    """ Summary statistics of the samples of a Subset.
+
+    Statistics of different Subsets can be merged without accessing the
+    samples again. Features are summarized through their sum and the sum of
+    squared differences from their mean, which can be merged in a numerically
+    stable way [1]_.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of samples.
+    nnz : int
+        Number of non-zero values in the samples.
+    min : ndarray, shape = [n_features,]
+        Minimum value of each feature. NaN if there are no samples.
+    max : ndarray, shape = [n_features,]
+        Maximum value of each feature. NaN if there are no samples.
+    sum : ndarray, shape = [n_features,]
+        Sum of each feature.
+    m2 : ndarray, shape = [n_features,]
+        Sum of the squared differences from the mean of each feature.
+
+    References
+    ----------
+    .. [1] Chan, T. F., Golub, G. H., & LeVeque, R. J. (1982). Updating
+        formulae and a pairwise algorithm for computing sample variances. In
+        COMPSTAT 1982 (pp. 30-41).
+    """
+
+    def __init__(self, n_samples, nnz, min, max, sum, m2):
+        self.n_samples = n_samples
+        self.nnz = nnz
+        self.min = min
+        self.max = max
+        self.sum = sum
+        self.m2 = m2
+
+    @staticmethod
+    def from_samples(samples):
+        """ Computes the statistics of an array of samples.
+
+        Parameters
+        ----------
+        samples : ndarray or sparse matrix, shape = [n_samples, n_features]
+
+        Returns
+        -------
+        stats : SubsetStats
+        """
+        n_samples, n_features = samples.shape
+
+        if n_samples == 0:
+            nan = np.full(n_features, np.nan)
+            zeros = np.zeros(n_features)
+            return SubsetStats(0, 0, nan, nan.copy(), zeros, zeros.copy())
+
+        if issparse(samples):
+            nnz = samples.count_nonzero()
+            min_ = samples.min(axis=0).toarray()[0]
+            max_ = samples.max(axis=0).toarray()[0]
+            sum_ = np.asarray(samples.sum(axis=0, dtype=float)).ravel()
+            sum_sq = samples.multiply(samples).sum(axis=0, dtype=float)
+            m2 = np.asarray(sum_sq).ravel() - sum_ * sum_ / n_samples
+            m2 = np.maximum(m2, 0)
         else:
-            subset = Subset(self.samples[item])
-        return subset
+            nnz = np.count_nonzero(samples)
+            min_ = np.min(samples, axis=0)
+            max_ = np.max(samples, axis=0)
+            sum_ = np.sum(samples, axis=0, dtype=float)
+            diff = samples - sum_ / n_samples
+            m2 = np.einsum("ij,ij->j", diff, diff)
+
+        return SubsetStats(n_samples, nnz, min_, max_, sum_, m2)
+
+    @property
+    def mean(self):
+        return self.sum / self.n_samples
+
+    @property
+    def var(self):
+        return self.m2 / self.n_samples
+
+    def merge(self, other):
+        """ Returns the statistics of the union of the samples summarized
+        by this SubsetStats and other.
+
+        Parameters
+        ----------
+        other : SubsetStats
+
+        Returns
+        -------
+        stats : SubsetStats
+        """
+        n_samples = self.n_samples + other.n_samples
+
+        if self.n_samples == 0 or other.n_samples == 0:
+            m2 = self.m2 + other.m2
+        else:
+            delta = other.mean - self.mean
+            m2 = self.m2 + other.m2 + delta ** 2 * (
+                self.n_samples * other.n_samples / n_samples)
+
+        return SubsetStats(n_samples=n_samples,
+                           nnz=self.nnz + other.nnz,
+                           min=np.fmin(self.min, other.min),
+                           max=np.fmax(self.max, other.max),
+                           sum=self.sum + other.sum,
+                           m2=m2)
+
+
+_FORMAT_NAME = "dislib-dataset"
+_FORMAT_VERSION = 1
+_MANIFEST_FILE = "manifest.json"
+_STATS_FILE = "stats.npy"
+
+
+def _subset_file(path, index, name):
+    return os.path.join(path, "subset_%d_%s.npy" % (index, name))
+
+
+def _copy_if_shared(arr, base):
+    if issparse(arr):
+        shared = np.may_share_memory(arr.data, base.data)
+    else:
+        shared = np.may_share_memory(arr, base)
+
+    if shared:
+        return arr.copy()
+
+    return arr
+
+
+def _label_dtype(label):
+    dtype = np.min_scalar_type(label)
+
+    # floats are not shrunk to avoid losing precision
+    if dtype.kind == "f":
+        return np.result_type(dtype, np.float64)
+
+    return dtype
+
+
+def _empty_labels(n_samples, dtype):
+    # any integer can be a real label (e.g., -1 for DBSCAN noise), so unset
+    # numeric labels are NaN
+    if dtype.kind in "biuf":
+        dtype = np.result_type(dtype, np.float64)
+        return np.full(n_samples, np.nan, dtype)
+
+    return np.full(n_samples, None, object)
+
+
+def _compact_labels(labels):
+    if labels.dtype.kind not in "iu" or labels.size == 0:
+        return labels
+
+    dtype = np.result_type(np.min_scalar_type(labels.min()),
+                           np.min_scalar_type(labels.max()))
+
+    return labels.astype(dtype, copy=False)
+
+
+def _vstack_dense(arrays):
+    """ Stacks arrays vertically allocating the result only once. """
+    n_rows = sum(arr.shape[0] for arr in arrays)
+    dtype = np.result_type(*arrays)
+    stacked = np.empty((n_rows,) + arrays[0].shape[1:], dtype=dtype)
+    start = 0
+
+    for arr in arrays:
+        end = start + arr.shape[0]
+        stacked[start:end] = arr
+        start = end
+
+    return stacked
+
+
+def _vstack_sparse(matrices):
+    """ Stacks sparse matrices vertically into a single CSR matrix by
+    concatenating their data, indices and indptr arrays.
+    """
+    matrices = [sp.csr_matrix(m) for m in matrices]
+    nnz = np.array([m.indptr[-1] for m in matrices])
+    offsets = np.concatenate(([0], np.cumsum(nnz)))
+
+    data = np.concatenate([m.data[:n] for m, n in zip(matrices, nnz)])
+    indices = np.concatenate([m.indices[:n] for m, n in zip(matrices, nnz)])
+    indptr = [m.indptr[:-1] + off for m, off in zip(matrices, offsets)]
+    indptr = np.concatenate(indptr + [offsets[-1:]])
+
+    n_rows = indptr.shape[0] - 1
+    n_cols = matrices[0].shape[1]
+
+    return sp.csr_matrix((data, indices, indptr), shape=(n_rows, n_cols))
 
 
 @task(returns=int)
@@ -369,58 +1083,107 @@ def _subset_size(subset):
     return subset.samples.shape[0]
 
 
-@task(returns=object)
-def _subset_apply(subset, f, return_subset=False):
-    samples = [f(sample) for sample in subset.samples]
-    s = np.array(samples).reshape(len(samples), -1)
+@task(returns=int)
+def _subset_n_features(subset):
+    return subset.samples.shape[1]
+
+
+@task(returns=1)
+def _map_block(subset, f):
+    return f(subset.samples, subset.labels)
 
-    if return_subset:
-        s = Subset(samples=s)
 
-    return s
+@task(returns=2)
+def _map_subset(subset, f):
+    result = f(subset.samples, subset.labels)
 
+    if isinstance(result, tuple):
+        new_subset = Subset(result[0], result[1], copy=False)
+    else:
+        new_subset = Subset(result, copy=False)
 
-@task(returns=np.array)
-def _get_min_max(subset):
-    mn = np.min(subset.samples, axis=0)
-    mx = np.max(subset.samples, axis=0)
+    return new_subset, new_subset.samples.shape[0]
 
-    if issparse(subset.samples):
-        mn = mn.toarray()[0]
-        mx = mx.toarray()[0]
 
-    return np.array([mn, mx])
+def _apply_rows(f, samples, labels):
+    rows = [f(sample) for sample in samples]
+    return np.array(rows).reshape(len(rows), -1)
 
 
 @task(returns=1)
-def _get_split_i(subset, i, n_subsets):
-    """
-    Returns the columns corresponding to group i, if the subset is divided
-    into n_subsets groups of columns.
-    """
+def _save_subset(subset, path, index):
+    samples = subset.samples
 
-    # number of elements per group
-    stride = subset.samples.shape[1] // n_subsets
+    if issparse(samples):
+        samples = sp.csr_matrix(samples)
+        np.save(_subset_file(path, index, "data"), samples.data)
+        np.save(_subset_file(path, index, "indices"), samples.indices)
+        np.save(_subset_file(path, index, "indptr"), samples.indptr)
+    else:
+        np.save(_subset_file(path, index, "samples"), samples)
 
-    # if it's the last group, just add all remaining element (end = None)
-    start_idx = i * stride
-    end_idx = (i + 1) * stride
-    if i == n_subsets - 1:
-        end_idx = None
+    if subset.labels is not None:
+        np.save(_subset_file(path, index, "labels"), subset.labels)
 
-    samples_i = subset.samples[:, start_idx:end_idx]
+    return subset.labels is not None
 
-    return samples_i
+
+@task(returns=1)
+def _combine(combine_f, *partials):
+    return combine_f(*partials)
 
 
 @task(returns=1)
-def _merge_split_subsets(sparse, *split_subsets):
-    stack_f = sp.vstack if sparse else np.vstack
+def _get_stats(subset):
+    return SubsetStats.from_samples(subset.samples)
+
 
-    # each sublist (sl) contains samples with a subset of columns. Each
-    # sublist must be stacked vertical first. Then all sublists must be
-    # stacked among themselves forming the final columns.
-    col_samples = stack_f([stack_f(sl) for sl in split_subsets])
+@task(returns=1)
+def _merge_stats(*stats):
+    merged = stats[0]
+
+    for other in stats[1:]:
+        merged = merged.merge(other)
+
+    return merged
+
+
+@task(returns="n_blocks")
+def _split_cols(subset, bounds, n_blocks):
+    """ Returns the samples of subset split in n_blocks groups of columns
+    delimited by bounds. """
+    samples = subset.samples
+
+    if issparse(samples):
+        samples = samples.tocsc()
+
+    blocks = []
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        block = samples[:, start:end]
 
-    # finally we transpose the columns.
-    return Subset(samples=col_samples.transpose())
+        if issparse(block):
+            block = block.tocsr()
+        else:
+            block = block.copy()
+
+        blocks.append(block)
+
+    if n_blocks == 1:
+        return blocks[0]
+
+    return blocks
+
+
+@task(returns=1)
+def _merge_split_subsets(sparse, *split_subsets):
+    # each element contains the samples of an input subset restricted to a
+    # group of columns. These are stacked vertically and then transposed.
+    if sparse:
+        col_samples = _vstack_sparse(split_subsets)
+        samples = col_samples.transpose().tocsr()
+    else:
+        col_samples = _vstack_dense(split_subsets)
+        samples = col_samples.transpose()
+
+    return Subset(samples=samples, copy=False)
@@ -14,9 +14,10 @@ class StandardScaler(object):
 
     Parameters
     ----------
-    arity : int, optional (default=50)
+    arity : int, optional (default=None)
         Arity of the reduction phase carried out to compute the mean and
-        variance of the input dataset.
+        variance of the input dataset. If None, it is chosen from the number
+        of subsets and the number of features.
 
     Attributes
     ----------
@@ -26,7 +27,7 @@ class StandardScaler(object):
         The variance for each feature in the training set.
     """
 
-    def __init__(self, arity=50):
+    def __init__(self, arity=None):
         self._mean = None
         self._var = None
         self._arity = arity
@@ -54,21 +55,10 @@ class StandardScaler(object):
         ----------
         dataset : Dataset
         """
-        partial_sums = []
-
-        for subset in dataset:
-            partial_sums.append(_partial_sum(subset))
-
-        total_sum = self._merge_partial_sums(partial_sums)
-
-        partial_vars = []
-
-        for subset in dataset:
-            partial_vars.append(_partial_var(subset, total_sum))
-
-        total_var = self._merge_partial_vars(partial_vars)
-
-        self._mean, self._var = _compute_stats(total_sum, total_var)
+        # the statistics are kept by the dataset, which only computes them
+        # for the subsets that were not summarized by the loaders
+        stats = dataset._feature_stats(self._arity)
+        self._mean, self._var = _compute_stats(stats)
 
     def fit_transform(self, dataset):
         """ Fit to data, then transform it.
@@ -94,54 +84,16 @@ class StandardScaler(object):
         for subset in dataset:
             _transform(subset, self._mean, self._var)
 
-    def _merge_partial_sums(self, partials):
-        while len(partials) > 1:
-            partials_subset = partials[:self._arity]
-            partials = partials[self._arity:]
-            partials.append(_merge_sums(*partials_subset))
-
-        return partials[0]
-
-    def _merge_partial_vars(self, partials):
-        while len(partials) > 1:
-            partials_subset = partials[:self._arity]
-            partials = partials[self._arity:]
-            partials.append(_merge_vars(*partials_subset))
-
-        return partials[0]
-
-
-@task(returns=tuple)
-def _partial_sum(subset):
-    return np.sum(subset.samples, axis=0), subset.samples.shape[0]
-
-
-@task(returns=tuple)
-def _merge_sums(*partials):
-    sum_ = sum(par[0] for par in partials)
-    size_ = sum(par[1] for par in partials)
-    return sum_, size_
-
-
-@task(returns=np.array)
-def _partial_var(subset, sum):
-    mean = sum[0] / sum[1]
-    return np.sum((subset.samples - mean) ** 2, axis=0)
-
-
-@task(returns=np.array)
-def _merge_vars(*partials):
-    return np.sum(partials, axis=0)
+        dataset._reset_stats()
 
 
 @task(returns=2)
-def _compute_stats(sum, var):
-    mean_ = sum[0] / sum[1]
-    var_ = var / sum[1]
-    return mean_, var_
+def _compute_stats(stats):
+    return stats.mean, stats.var
 
 
 @task(subset=INOUT)
 def _transform(subset, mean, var):
-    scaled_samples = (subset.samples - mean) / np.sqrt(var)
+    scaled_samples = subset.samples - mean
+    scaled_samples /= np.sqrt(var)
     subset.samples = scaled_samples
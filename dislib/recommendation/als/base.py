@@ -6,7 +6,7 @@ from pycompss.api.task import task
 from scipy import sparse
 from sklearn.metrics import mean_squared_error
 
-from dislib.data import load_data
+from dislib.data import load_data, tree_reduce
 
 
 class ALS(object):
@@ -31,8 +31,9 @@ class ALS(object):
     random_state : int, orNone, optional (default=None)
         The seed of the pseudo random number generator used to initialize the
         items matrix I.
-    arity : int, optional (default=5)
-        The arity of the tasks during the merge of each matrix chunk.
+    arity : int, optional (default=None)
+        The arity of the tasks during the merge of each matrix chunk. If None,
+        it is chosen from the number of chunks and their size.
     verbose : boolean, optional (default=False)
         Whether to print progress information.
 
@@ -69,7 +70,7 @@ class ALS(object):
     """
 
     def __init__(self, random_state=None, n_f=100, lambda_=0.065,
-                 tol=1e-4, max_iter=100, arity=5,
+                 tol=1e-4, max_iter=100, arity=None,
                  check_convergence=True, verbose=False):
         # params
         self._seed = random_state
@@ -84,7 +85,7 @@ class ALS(object):
         self.users = None
         self.items = None
 
-    def _update(self, r, x):
+    def _update(self, r, x, n_rows):
         """ Returns updated matrix M given U (if x=U), or matrix U given M
         otherwise
 
@@ -95,24 +96,19 @@ class ALS(object):
             otherwise
         x : Dataset
             User or Item feature matrix
+        n_rows : int
+            Number of samples in r
         """
         res = []
         for subset in r:
             chunk_res = _update_chunk(subset, x, self._n_f, self._lambda)
             res.append(chunk_res)
 
-        while len(res) > 1:
-            q = []
-            while len(res) > 0:
-                # we pop the future objects to merge
-                to_merge = res[:self._arity]
-                del res[:self._arity]
-                # if it's a single object, just add it to next step
-                aux = _merge(*to_merge) if len(to_merge) > 1 else to_merge[0]
-                q.append(aux)
-            res = q
-
-        return res.pop()
+        # chunks are stacked, so the partial results grow at each level of
+        # the tree. The average chunk size is used to choose the arity
+        itemsize = np.dtype(_FACTORS_DTYPE).itemsize
+        chunk_nbytes = n_rows / len(r) * self._n_f * itemsize
+        return tree_reduce(res, _merge, self._arity, chunk_nbytes)
 
     def _has_finished(self, i):
         return i >= self._max_iter or self.converged
@@ -143,6 +139,7 @@ class ALS(object):
         d_u = d_i.transpose()
 
         n_m = d_u.n_features
+        n_u = d_i.n_features
 
         if self._verbose:
             print("Item chunks: %s" % len(d_i))
@@ -159,19 +156,18 @@ class ALS(object):
         items = np.random.rand(n_m, self._n_f)
 
         # Assign average rating as first feature
-        average_ratings = d_i._apply(lambda row: np.mean(row.data),
-                                     sparse=False, return_dataset=True)
+        average_ratings = d_i.map_blocks(_mean_ratings, return_dataset=False)
         average_ratings = compss_wait_on(average_ratings)
 
-        items[:, 0] = average_ratings.samples.reshape(-1)
+        items[:, 0] = np.concatenate(average_ratings)
 
         rmse, last_rmse = np.inf, np.NaN
         i = 0
         while not self._has_finished(i):
             last_rmse = rmse
 
-            users = self._update(r=d_u, x=items)
-            items = self._update(r=d_i, x=users)
+            users = self._update(r=d_u, x=items, n_rows=n_u)
+            items = self._update(r=d_i, x=users, n_rows=n_m)
 
             if self._check_convergence:
                 if test is not None:
@@ -215,6 +211,20 @@ class ALS(object):
         return self.users[user_id].dot(self.items.T)
 
 
+_FACTORS_DTYPE = np.float32
+
+
+def _mean_ratings(samples, labels):
+    """ Returns the mean of the stored ratings of each row of a CSR matrix.
+    """
+    samples = sparse.csr_matrix(samples)
+    n_ratings = np.diff(samples.indptr)
+
+    # rows without ratings get NaN, as the mean of an empty array
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.asarray(samples.sum(axis=1)).ravel() / n_ratings
+
+
 @task(returns=np.array)
 def _merge(*chunks):
     res = np.vstack(chunks)
@@ -225,7 +235,7 @@ def _merge(*chunks):
 def _update_chunk(subset, x, n_f, lambda_):
     r_chunk = subset.samples
     n = r_chunk.shape[0]
-    y = np.zeros((n, n_f), dtype=np.float32)
+    y = np.zeros((n, n_f), dtype=_FACTORS_DTYPE)
     n_c = np.array(
         [len(sparse.find(r_chunk[i])[0]) for i in
          range(0, r_chunk.shape[0])])
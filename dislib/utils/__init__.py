@@ -1,3 +1,5 @@
-from dislib.utils.base import shuffle, as_grid, resample
+from dislib.utils.base import shuffle, as_grid, resample, train_test_split
+from dislib.utils.classes import KFold, StratifiedKFold
 
-__all__ = ['shuffle', 'as_grid', 'resample']
+__all__ = ['shuffle', 'as_grid', 'resample', 'train_test_split', 'KFold',
+           'StratifiedKFold']
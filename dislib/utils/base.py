@@ -1,13 +1,20 @@
 import numpy as np
 from pycompss.api.api import compss_wait_on
 from pycompss.api.task import task
-from scipy.sparse import vstack
+from scipy.sparse import issparse
+from sklearn.utils import check_random_state
 
 from dislib.data import Dataset, Subset
+from dislib.data.classes import _vstack_dense, _vstack_sparse
+from dislib.utils.grid import Grid
 
 
-def resample(dataset, n_samples, random_state=None):
-    """ Resamples a dataset without replacement.
+def resample(dataset, n_samples, random_state=None, replace=True,
+             weights=None):
+    """ Resamples a dataset.
+
+    The number of samples taken from each Subset is drawn in the driver, and
+    each Subset draws its own samples in an independent task.
 
     Parameters
     ----------
@@ -18,6 +25,11 @@ def resample(dataset, n_samples, random_state=None):
     random_state : int or RandomState, optional (default=None)
         Seed or numpy.random.RandomState instance to use in the generation of
         random numbers.
+    replace : boolean, optional (default=True)
+        Whether to sample with replacement.
+    weights : array-like, shape=[n_samples_total, ], optional (default=None)
+        Probability weights of the samples in the input dataset. If None, all
+        samples are equally likely. Only supported with replacement.
 
     Returns
     -------
@@ -25,30 +37,53 @@ def resample(dataset, n_samples, random_state=None):
         Resampled dataset. The number of subsets in the returned dataset is
         less or equal to the number of subsets in the input dataset.
     """
+    random_state = check_random_state(random_state)
+    sizes = np.array(dataset.subsets_sizes())
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+
+    if not replace:
+        assert weights is None, \
+            "Weighted sampling is only supported with replacement."
+        assert n_samples <= bounds[-1], \
+            "Cannot take more samples than the dataset has without " \
+            "replacement."
+
+        counts = _hypergeometric_counts(sizes, n_samples, random_state)
+    elif weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        assert weights.shape == (bounds[-1],), \
+            "weights must contain one value per sample."
+
+        # differences of the cumulative sum, as reduceat returns a weight
+        # instead of 0 for empty subsets
+        cum_weights = np.concatenate(([0], np.cumsum(weights)))
+        subset_weights = np.diff(cum_weights[bounds])
+        counts = random_state.multinomial(n_samples,
+                                          subset_weights / weights.sum())
+    else:
+        counts = random_state.multinomial(n_samples, sizes / bounds[-1])
+
     r_data = Dataset(dataset.n_features, dataset.sparse)
-    np.random.seed(random_state)
-    sizes = dataset.subsets_sizes()
-    indices = np.random.choice(range(sum(sizes)), size=n_samples)
-    offset = 0
 
-    for subset, size in zip(dataset, sizes):
-        subset_indices = indices - offset
-        subset_indices = subset_indices[subset_indices >= 0]
-        subset_indices = subset_indices[subset_indices < size]
+    for index, (subset, count) in enumerate(zip(dataset, counts)):
+        if count > 0:
+            subset_weights = None
 
-        if subset_indices.size > 0:
-            r_data.append(_resample(subset, subset_indices))
+            if weights is not None:
+                subset_weights = weights[bounds[index]:bounds[index + 1]]
 
-        offset += size
+            seed = _draw_seed(random_state)
+            r_data.append(_resample(subset, count, replace, subset_weights,
+                                    seed), int(count))
 
     return r_data
 
 
-def as_grid(dataset, n_regions, dimensions=None, return_indices=False):
+def as_grid(dataset, n_regions, dimensions=None, return_indices=False,
+            binning="uniform"):
     """ Arranges samples in an n-dimensional grid where each Subset contains
     samples lying in one region of the feature space. The feature space is
-    divided in ``n_regions`` equally sized regions on each dimension based on
-    the maximum and minimum values of each feature in the dataset.
+    divided in ``n_regions`` regions on each dimension.
 
     Parameters
     ----------
@@ -61,6 +96,20 @@ def as_grid(dataset, n_regions, dimensions=None, return_indices=False):
         are split.
     return_indices : boolean, optional (default=False)
         Whether to return sorting indices.
+    binning : string, optional (default="uniform")
+        How to divide each dimension:
+
+        - "uniform": in equally sized regions between the minimum and
+          maximum values of the feature in the dataset.
+        - "quantile": at approximate quantiles of the feature, so that each
+          region of a dimension contains a similar number of samples.
+        - "kd": recursively, like a k-d tree. The first dimension is divided
+          at its approximate quantiles, and each region is then divided
+          along the next dimension at the approximate quantiles of the
+          samples in that region. This balances the number of samples of all
+          the regions.
+
+        Quantiles are approximated by merging a sketch of each Subset.
 
     Returns
     -------
@@ -70,32 +119,12 @@ def as_grid(dataset, n_regions, dimensions=None, return_indices=False):
         Array of indices that sort the samples in grid_data back to the
         order they have in the input Dataset.
     """
-    n_features = dataset.n_features
-
-    if dimensions is None:
-        dimensions = range(n_features)
-
-    grid_shape = (n_regions,) * len(dimensions)
-
-    min_ = dataset.min_features()
-    max_ = dataset.max_features()
-
-    bins = _generate_bins(min_, max_, dimensions, n_regions)
-
-    sorted_data, sorting = _sort_data(dataset, grid_shape, bins, dimensions)
-    sorted_data._min_features = np.copy(min_)
-    sorted_data._max_features = np.copy(max_)
-    ret_value = sorted_data
+    grid = Grid(dataset, n_regions, dimensions, binning)
+    ret_value = grid.arrange(dataset, return_indices)
 
     if return_indices:
-        subset_sizes = []
-
-        for index, _ in enumerate(dataset):
-            subset_sizes.append(dataset.subset_size(index))
-
-        indices = _get_sorting_indices(sorting, subset_sizes)
-        indices = np.argsort(indices)
-        ret_value = sorted_data, indices
+        sorted_data, indices = ret_value
+        ret_value = sorted_data, compss_wait_on(indices)
 
     return ret_value
 
@@ -103,6 +132,10 @@ def as_grid(dataset, n_regions, dimensions=None, return_indices=False):
 def shuffle(dataset, random_state=None):
     """ Randomly shuffles a Dataset.
 
+    Each Subset is permuted and split into one bucket per output Subset by a
+    single task, and each output Subset merges and permutes its buckets in
+    another task.
+
     Parameters
     ----------
     dataset : Dataset
@@ -117,153 +150,199 @@ def shuffle(dataset, random_state=None):
         A new ramdomly shuffled Dataset with the same number of Subsets as the
         input Dataset.
     """
+    random_state = check_random_state(random_state)
     shuffled_data = Dataset(dataset.n_features, dataset.sparse)
     n_subsets = len(dataset)
-    items = []
-    np.random.seed(random_state)
+    buckets = []
 
-    for _ in dataset:
-        items.append([])
+    for index, subset in enumerate(dataset):
+        seed = _draw_seed(random_state)
+        subset_buckets = _split_shuffled(subset, index, seed, n_subsets)
 
-    for subset_idx, subset in enumerate(dataset):
-        subset_size = dataset.subset_size(subset_idx)
-        sample_size = max(1, int(subset_size / n_subsets))
-        indices = np.array(range(subset_size))
-        i = 0
+        if n_subsets == 1:
+            subset_buckets = [subset_buckets]
 
-        while indices.size > 0:
-            n_samples = min(sample_size, indices.size)
-            choice = np.random.choice(indices, n_samples, replace=False)
-            indices = np.setdiff1d(indices, choice)
-            items[i].append(_get_items(subset, choice))
-            i = (i + 1) % len(items)
+        buckets.append(subset_buckets)
 
-    for item in items:
-        shuffled_data.append(_merge_subsets(*item))
+    for dest_buckets in zip(*buckets):
+        seed = _draw_seed(random_state)
+        shuffled_data.append(_merge_shuffled(seed, *dest_buckets))
 
     return shuffled_data
 
 
-def _generate_bins(min_, max_, dimensions, n_regions):
-    bins = []
+def train_test_split(dataset, test_size=0.25, shuffle=True, stratify=False,
+                     random_state=None):
+    """ Splits a Dataset into a train and a test Dataset.
+
+    Each Subset is split by an independent task, and the number of test
+    samples taken from each Subset is proportional to its size.
 
-    # create bins for the different regions in the grid in every dimension
-    for dim in dimensions:
-        bin_ = np.linspace(min_[dim], max_[dim], n_regions + 1)
-        bins.append(bin_)
+    Parameters
+    ----------
+    dataset : Dataset
+        Input data.
+    test_size : float or int, optional (default=0.25)
+        If float, fraction of the samples to include in the test Dataset. If
+        int, absolute number of test samples.
+    shuffle : boolean, optional (default=True)
+        Whether to choose the test samples of each Subset randomly. If False,
+        the last samples of each Subset are used for testing.
+    stratify : boolean, optional (default=False)
+        Whether to preserve the proportion of samples of each label in every
+        Subset. Requires a labeled Dataset.
+    random_state : int or RandomState, optional (default=None)
+        Seed or numpy.random.RandomState instance to use in the generation of
+        random numbers.
 
-    return bins
+    Returns
+    -------
+    train_data : Dataset
+        Train samples. Samples in each Subset keep their original order.
+    test_data : Dataset
+        Test samples. Samples in each Subset keep their original order.
+    """
+    sizes = dataset.subsets_sizes()
+    n_samples = sum(sizes)
 
+    if isinstance(test_size, float):
+        assert 0 < test_size < 1, "test_size must be between 0 and 1."
+        n_test = int(np.ceil(test_size * n_samples))
+    else:
+        n_test = test_size
 
-def _sort_data(dataset, grid_shape, bins, dimensions):
-    sorted_data = Dataset(dataset.n_features, dataset.sparse)
-    sorting_list = []
+    assert 0 < n_test < n_samples, \
+        "test_size must leave samples in the train and test Datasets."
 
-    for idx in np.ndindex(grid_shape):
-        subset, subset_size, sorting = _filter(idx, bins, dimensions,
-                                               dataset.sparse, *dataset)
-        sorted_data.append(subset, subset_size)
-        sorting_list.append(sorting)
+    random_state = check_random_state(random_state)
+    test_sizes = _distribute(sizes, n_test)
+    train_data = Dataset(dataset.n_features, dataset.sparse)
+    test_data = Dataset(dataset.n_features, dataset.sparse)
 
-    sorting = _merge_sorting(*sorting_list)
+    for subset, size, subset_n_test in zip(dataset, sizes, test_sizes):
+        seed = _draw_seed(random_state) if shuffle else None
+        piece_sizes = [size - subset_n_test, subset_n_test]
+        pieces = _split_subset(subset, piece_sizes, stratify, seed, 2)
 
-    return sorted_data, sorting
+        for data, piece, piece_size in zip((train_data, test_data), pieces,
+                                           piece_sizes):
+            if piece_size > 0:
+                data.append(piece, piece_size)
 
+    return train_data, test_data
 
-def _get_sorting_indices(sorting, subset_sizes):
-    indices = []
-    sorting = compss_wait_on(sorting)
 
-    for part_ind, vec_ind in sorting:
-        offset = np.sum(subset_sizes[:part_ind])
+def _distribute(sizes, n):
+    """ Distributes n among sizes proportionally, using the largest
+    remainder method so that the result adds up to n. """
+    sizes = np.asarray(sizes)
+    shares = sizes * n / sizes.sum()
+    counts = np.floor(shares).astype(int)
+    remainders = shares - counts
+    counts[np.argsort(-remainders, kind="mergesort")[:n - counts.sum()]] += 1
 
-        for ind in vec_ind:
-            indices.append(ind + offset)
+    return counts.tolist()
 
-    return np.array(indices, dtype=int)
 
+def _draw_seed(random_state):
+    return random_state.randint(np.iinfo(np.int32).max)
 
-@task(returns=1)
-def _get_items(subset, indices):
-    return subset[indices]
 
+def _hypergeometric_counts(sizes, n_samples, random_state):
+    """ Draws the number of samples taken from each Subset when sampling
+    without replacement. """
+    counts = np.zeros(len(sizes), dtype=int)
+    remaining = int(np.sum(sizes))
 
-@task(returns=Dataset)
-def _merge_subsets(*subsets):
-    set0 = subsets[0].copy()
+    for index, size in enumerate(sizes):
+        remaining -= size
 
-    for setx in subsets[1:]:
-        set0.concatenate(setx)
+        if n_samples > 0:
+            counts[index] = random_state.hypergeometric(size, remaining,
+                                                        n_samples) \
+                if remaining > 0 else n_samples
+            n_samples -= counts[index]
 
-    return set0
+    return counts
 
 
-@task(returns=3)
-def _filter(idx, bins, dimensions, sparse, *dataset):
-    filtered_samples = []
-    filtered_labels = []
-    sorting = []
-    n_bins = bins[0].shape[0] - 1
+def _interleave(sizes):
+    """ Returns the piece of each position so that the positions of each
+    piece are evenly spread. """
+    keys = [(np.arange(size) + 0.5) / max(size, 1) for size in sizes]
+    pieces = np.repeat(np.arange(len(sizes)), sizes)
 
-    for set_idx, subset in enumerate(dataset):
-        filtered_samples.append(subset.samples)
-        final_ind = np.array(range(subset.samples.shape[0]))
+    return pieces[np.argsort(np.concatenate(keys), kind="mergesort")]
 
-        # filter vectors by checking if they lie in the given region (specified
-        # by idx)
-        for bin_idx, col_idx in enumerate(dimensions):
-            col = filtered_samples[-1][:, col_idx]
 
-            if sparse:
-                col = col.toarray().flatten()
+@task(returns="n_buckets")
+def _split_shuffled(subset, index, seed, n_buckets):
+    n_samples = subset.samples.shape[0]
+    perm = np.random.RandomState(seed).permutation(n_samples)
 
-            indices = np.digitize(col, bins[bin_idx]) - 1
-            indices[indices >= n_bins] = n_bins - 1
-            mask = (indices == idx[bin_idx])
-            filtered_samples[-1] = filtered_samples[-1][mask]
-            final_ind = final_ind[mask]
+    # rotate the larger buckets so that the output Subsets are balanced
+    sizes = [n_samples // n_buckets +
+             int((bucket - index) % n_buckets < n_samples % n_buckets)
+             for bucket in range(n_buckets)]
+    bounds = np.cumsum([0] + sizes)
+    buckets = [subset[perm[start:end]]
+               for start, end in zip(bounds[:-1], bounds[1:])]
 
-            if filtered_samples[-1].size == 0:
-                break
+    if n_buckets == 1:
+        return buckets[0]
 
-        if subset.labels is not None:
-            filtered_labels.append(subset.labels[final_ind])
+    return buckets
 
-        sorting.append((set_idx, final_ind))
 
-    if not sparse:
-        final_samples = np.vstack(filtered_samples)
+@task(returns=1)
+def _merge_shuffled(seed, *subsets):
+    if issparse(subsets[0].samples):
+        samples = _vstack_sparse([subset.samples for subset in subsets])
     else:
-        final_samples = vstack(filtered_samples)
+        samples = _vstack_dense([subset.samples for subset in subsets])
 
-    final_labels = None
+    labels = None
 
-    if subset.labels is not None:
-        final_labels = np.concatenate(filtered_labels)
+    if subsets[0].labels is not None:
+        labels = np.concatenate([subset.labels for subset in subsets])
 
-    filtered_subset = Subset(samples=final_samples, labels=final_labels)
+    perm = np.random.RandomState(seed).permutation(samples.shape[0])
 
-    return filtered_subset, final_samples.shape[0], sorting
+    return Subset(samples, labels, copy=False)[perm]
 
 
 @task(returns=1)
-def _create_subset(samples, labels):
-    if labels is None or None in labels:
-        return Subset(samples=samples)
-    else:
-        return Subset(samples=samples, labels=labels)
+def _resample(subset, n_samples, replace, weights, seed):
+    p = None
 
+    if weights is not None:
+        p = weights / weights.sum()
 
-@task(returns=1)
-def _merge_sorting(*sorting_list):
-    sorting_final = []
+    indices = np.random.RandomState(seed).choice(subset.samples.shape[0],
+                                                 n_samples, replace, p)
 
-    for sorting in sorting_list:
-        sorting_final.extend(sorting)
+    return subset[indices]
 
-    return sorting_final
 
+@task(returns="n_pieces")
+def _split_subset(subset, sizes, stratify, seed, n_pieces):
+    n_samples = subset.samples.shape[0]
+    order = np.arange(n_samples)
 
-@task(returns=1)
-def _resample(subset, indices):
-    return subset[indices]
+    if seed is not None:
+        order = np.random.RandomState(seed).permutation(n_samples)
+
+    if stratify:
+        assert subset.labels is not None, \
+            "Cannot stratify a Subset without labels."
+        order = order[np.argsort(subset.labels[order], kind="mergesort")]
+        pieces = _interleave(sizes)
+    else:
+        pieces = np.repeat(np.arange(n_pieces), sizes)
+
+    subsets = [subset[np.sort(order[pieces == p])] for p in range(n_pieces)]
+
+    if n_pieces == 1:
+        return subsets[0]
+
+    return subsets
@@ -0,0 +1,108 @@
+from sklearn.utils import check_random_state
+
+from dislib.data import Dataset
+from dislib.utils.base import _draw_seed, _split_subset
+
+
+class KFold(object):
+    """ K-fold cross-validator.
+
+    Splits each Subset of a Dataset in n_splits folds with an independent
+    task. Each fold is used once as test data while the remaining folds form
+    the train data. The train and test Datasets of all the splits reference
+    the same fold pieces, so no data is copied across splits.
+
+    Parameters
+    ----------
+    n_splits : int, optional (default=5)
+        Number of folds. Must be at least 2.
+    shuffle : boolean, optional (default=False)
+        Whether to shuffle the samples of each Subset before splitting them
+        in folds.
+    random_state : int or RandomState, optional (default=None)
+        Seed or numpy.random.RandomState instance to use in the generation of
+        random numbers. Only used if shuffle is True.
+    """
+
+    _stratify = False
+
+    def __init__(self, n_splits=5, shuffle=False, random_state=None):
+        assert n_splits >= 2, "n_splits must be at least 2."
+
+        self.n_splits = n_splits
+        self.shuffle = shuffle
+        self.random_state = random_state
+
+    def get_n_splits(self):
+        """ Returns the number of splits.
+
+        Returns
+        -------
+        n_splits : int
+        """
+        return self.n_splits
+
+    def split(self, dataset):
+        """ Generates the train and test Datasets of each split.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Input data.
+
+        Yields
+        ------
+        train_data : Dataset
+            Train samples of the split.
+        test_data : Dataset
+            Test samples of the split.
+        """
+        random_state = check_random_state(self.random_state)
+        k = self.n_splits
+        folds = []
+        fold_sizes = []
+
+        for index, (subset, size) in enumerate(zip(dataset,
+                                                   dataset.subsets_sizes())):
+            # rotate the larger folds so that they are balanced across
+            # Subsets
+            sizes = [size // k + int((f - index) % k < size % k)
+                     for f in range(k)]
+            seed = _draw_seed(random_state) if self.shuffle else None
+            folds.append(_split_subset(subset, sizes, self._stratify, seed,
+                                       k))
+            fold_sizes.append(sizes)
+
+        for test_fold in range(k):
+            train_data = Dataset(dataset.n_features, dataset.sparse)
+            test_data = Dataset(dataset.n_features, dataset.sparse)
+
+            for pieces, sizes in zip(folds, fold_sizes):
+                for fold, (piece, size) in enumerate(zip(pieces, sizes)):
+                    data = test_data if fold == test_fold else train_data
+
+                    if size > 0:
+                        data.append(piece, size)
+
+            yield train_data, test_data
+
+
+class StratifiedKFold(KFold):
+    """ Stratified K-fold cross-validator.
+
+    Variant of KFold that preserves the proportion of samples of each label
+    of every Subset in all the folds. Requires a labeled Dataset.
+
+    Parameters
+    ----------
+    n_splits : int, optional (default=5)
+        Number of folds. Must be at least 2.
+    shuffle : boolean, optional (default=False)
+        Whether to shuffle the samples of each label before splitting them in
+        folds.
+    random_state : int or RandomState, optional (default=None)
+        Seed or numpy.random.RandomState instance to use in the generation of
+        random numbers. Only used if shuffle is True.
+    """
+
+    _stratify = True
@@ -0,0 +1,320 @@
+import numpy as np
+from pycompss.api.api import compss_wait_on
+from pycompss.api.task import task
+from scipy.sparse import issparse
+
+from dislib.data import Dataset, Subset
+from dislib.data.classes import _vstack_dense, _vstack_sparse
+
+
+# number of quantiles of each Subset used to approximate the quantiles of a
+# Dataset
+_SKETCH_SIZE = 256
+
+
+class Grid(object):
+    """ Division of the feature space of a Dataset in an n-dimensional grid
+    of regions, as used by as_grid and DBSCAN.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        Data used to compute the limits of the regions.
+    n_regions : int
+        Number of regions per dimension in which to split the feature space.
+    dimensions : iterable, optional (default=None)
+        Integer indices of the dimensions to split. If None, all dimensions
+        are split.
+    binning : string, optional (default="uniform")
+        How to divide each dimension: "uniform", "quantile" or "kd". See
+        as_grid for more details.
+
+    Attributes
+    ----------
+    n_regions : int
+        Number of regions per dimension.
+    dimensions : list
+        Indices of the split dimensions.
+    """
+
+    def __init__(self, dataset, n_regions, dimensions=None,
+                 binning="uniform"):
+        if dimensions is None:
+            dimensions = range(dataset.n_features)
+
+        self.n_regions = n_regions
+        self.dimensions = list(dimensions)
+        self._levels = _grid_levels(dataset, n_regions, self.dimensions,
+                                    binning)
+
+    def arrange(self, dataset, return_indices=False):
+        """ Arranges the samples of dataset in one Subset per region, in the
+        order of np.ndindex.
+
+        Parameters
+        ----------
+        dataset : Dataset
+            Input data.
+        return_indices : boolean, optional (default=False)
+            Whether to return sorting indices.
+
+        Returns
+        -------
+        grid_data : Dataset
+            A new Dataset with one Subset per region.
+        index_array : future object
+            Array of indices that sort the samples in grid_data back to the
+            order they have in the input Dataset.
+        """
+        sorted_data, sorting_list = _sort_data(dataset, self.n_regions,
+                                               self._levels)
+        sorted_data._min_features = np.copy(dataset.min_features())
+        sorted_data._max_features = np.copy(dataset.max_features())
+
+        if return_indices:
+            return sorted_data, _sorting_indices(*sorting_list)
+
+        return sorted_data
+
+    def region_bounds(self):
+        """ Returns the lower and upper bounds of each region, in the order
+        of np.ndindex.
+
+        Returns
+        -------
+        lower : ndarray, shape=[n_regions ** len(dimensions), len(dimensions)]
+            Lower bound of each region in every split dimension.
+        upper : ndarray, shape=[n_regions ** len(dimensions), len(dimensions)]
+            Upper bound of each region in every split dimension.
+        """
+        n_dims = len(self._levels)
+        n_regions = self.n_regions
+        n_cells = n_regions ** n_dims
+        lower = np.empty((n_cells, n_dims))
+        upper = np.empty((n_cells, n_dims))
+
+        for cell, cell_idx in enumerate(np.ndindex((n_regions,) * n_dims)):
+            node = 0
+
+            for level, (_, edges) in enumerate(self._levels):
+                node_edges = edges[node] if edges.shape[0] > 1 else edges[0]
+                lower[cell, level] = node_edges[cell_idx[level]]
+                upper[cell, level] = node_edges[cell_idx[level] + 1]
+                node = node * n_regions + cell_idx[level]
+
+        return lower, upper
+
+
+def _grid_levels(dataset, n_regions, dimensions, binning):
+    """ Returns one (dimension, edges) pair per split dimension. edges has
+    shape (n_nodes, n_regions + 1), where n_nodes is 1 if all the regions
+    of the previous dimensions are split at the same values, and the number
+    of regions of the previous dimensions otherwise. """
+    dimensions = list(dimensions)
+
+    if binning == "uniform":
+        bins = _generate_bins(dataset.min_features(), dataset.max_features(),
+                              dimensions, n_regions)
+        return [(dim, bin_[np.newaxis]) for dim, bin_ in zip(dimensions, bins)]
+    elif binning == "quantile":
+        edges = _quantile_edges(dataset, [], dimensions, n_regions)
+        return [(dim, edges[i]) for i, dim in enumerate(dimensions)]
+    elif binning == "kd":
+        levels = []
+
+        for dim in dimensions:
+            edges = _quantile_edges(dataset, levels, [dim], n_regions)
+            levels.append((dim, edges[0]))
+
+        return levels
+
+    raise ValueError("Invalid value for 'binning': %s." % binning)
+
+
+def _quantile_edges(dataset, levels, dimensions, n_regions):
+    sketches = [_sketch(subset, levels, dimensions, n_regions)
+                for subset in dataset]
+
+    return compss_wait_on(_merge_sketches(n_regions, *sketches))
+
+
+def _cell_ids(samples, levels, n_regions):
+    """ Returns the region of each sample as an index in the order of
+    np.ndindex, or the region of the previous dimensions if levels only
+    contains the first dimensions. """
+    cells = np.zeros(samples.shape[0], dtype=int)
+
+    for dim, edges in levels:
+        col = samples[:, dim]
+
+        if issparse(samples):
+            col = col.toarray()
+
+        col = np.asarray(col).reshape(-1, 1)
+        node_edges = edges[cells] if edges.shape[0] > 1 else edges
+
+        # the first and last edges are ignored so that values out of range
+        # belong to the first and last regions
+        child = np.count_nonzero(col >= node_edges[:, 1:-1], axis=1)
+        cells = cells * n_regions + child
+
+    return cells
+
+
+def _generate_bins(min_, max_, dimensions, n_regions):
+    bins = []
+
+    # create bins for the different regions in the grid in every dimension
+    for dim in dimensions:
+        bin_ = np.linspace(min_[dim], max_[dim], n_regions + 1)
+        bins.append(bin_)
+
+    return bins
+
+
+def _sort_data(dataset, n_regions, levels):
+    sorted_data = Dataset(dataset.n_features, dataset.sparse)
+    n_cells = n_regions ** len(levels)
+    buckets = []
+
+    for set_idx, subset in enumerate(dataset):
+        subset_buckets = _bucket_by_cell(subset, set_idx, levels,
+                                         n_regions, n_cells)
+
+        if n_cells == 1:
+            subset_buckets = [subset_buckets]
+
+        buckets.append(subset_buckets)
+
+    sorting_list = []
+
+    for cell_buckets in zip(*buckets):
+        subset, subset_size, sorting = _merge_cell(*cell_buckets)
+        sorted_data.append(subset, subset_size)
+        sorting_list.append(sorting)
+
+    return sorted_data, sorting_list
+
+
+@task(returns="n_cells")
+def _bucket_by_cell(subset, set_idx, levels, n_regions, n_cells):
+    """ Splits the samples of a Subset by the grid cell they lie in. Returns
+    one (set_idx, Subset, indices) bucket per cell, where indices are the
+    positions of the samples in the input Subset. """
+    cells = _cell_ids(subset.samples, levels, n_regions)
+    order = np.argsort(cells, kind="mergesort")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(cells,
+                                                        minlength=n_cells))))
+    buckets = []
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        indices = order[start:end]
+        buckets.append((set_idx, subset[indices], indices))
+
+    if n_cells == 1:
+        return buckets[0]
+
+    return buckets
+
+
+@task(returns=3)
+def _merge_cell(*buckets):
+    subsets = [subset for _, subset, _ in buckets]
+
+    if issparse(subsets[0].samples):
+        samples = _vstack_sparse([subset.samples for subset in subsets])
+    else:
+        samples = _vstack_dense([subset.samples for subset in subsets])
+
+    labels = None
+
+    if subsets[0].labels is not None:
+        labels = np.concatenate([subset.labels for subset in subsets])
+
+    sorting = [(set_idx, indices) for set_idx, _, indices in buckets]
+    subset = Subset(samples=samples, labels=labels, copy=False)
+
+    return subset, samples.shape[0], sorting
+
+
+@task(returns=1)
+def _sorting_indices(*sorting_list):
+    """ Returns the position in the grid Dataset of each sample of the input
+    Dataset. """
+    sorting = [item for cell_sorting in sorting_list for item in cell_sorting]
+    set_ids = np.array([set_idx for set_idx, _ in sorting], dtype=int)
+    lengths = np.array([indices.size for _, indices in sorting], dtype=int)
+    sizes = np.bincount(set_ids, weights=lengths).astype(int)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    # position in the input Dataset of each sample of the grid Dataset
+    positions = np.concatenate([indices + offsets[set_idx]
+                                for set_idx, indices in sorting])
+    inverse = np.empty_like(positions)
+    inverse[positions] = np.arange(positions.size)
+
+    return inverse
+
+
+@task(returns=1)
+def _sketch(subset, levels, dimensions, n_regions):
+    """ Returns the number of samples in each region of the previous
+    dimensions, and the values of dimensions at evenly spaced quantiles of
+    the samples of each region. """
+    samples = subset.samples
+    n_nodes = n_regions ** len(levels)
+    nodes = _cell_ids(samples, levels, n_regions)
+    counts = np.bincount(nodes, minlength=n_nodes)
+    quantiles = np.linspace(0, 1, _SKETCH_SIZE)
+    points = np.full((len(dimensions), n_nodes, _SKETCH_SIZE), np.nan)
+
+    for i, dim in enumerate(dimensions):
+        col = samples[:, dim]
+
+        if issparse(samples):
+            col = col.toarray()
+
+        col = np.asarray(col).ravel()
+
+        for node in np.flatnonzero(counts):
+            points[i, node] = np.quantile(col[nodes == node], quantiles)
+
+    return counts, points
+
+
+@task(returns=1)
+def _merge_sketches(n_regions, *sketches):
+    """ Merges the sketches of all the Subsets into region edges of shape
+    (n_dimensions, n_nodes, n_regions + 1). """
+    counts = np.array([sketch[0] for sketch in sketches])
+    points = np.array([sketch[1] for sketch in sketches])
+    n_dims, n_nodes = points.shape[1:3]
+    ranks = np.linspace(0, 1, _SKETCH_SIZE)
+    targets = np.linspace(0, 1, n_regions + 1)
+    edges = np.zeros((n_dims, n_nodes, n_regions + 1))
+
+    for dim in range(n_dims):
+        for node in range(n_nodes):
+            node_counts = counts[:, node]
+            valid = np.flatnonzero(node_counts)
+
+            if valid.size == 0:
+                continue
+
+            node_points = points[valid, dim, node]
+            values = np.unique(node_points)
+
+            # approximate the cumulative distribution of the region as the
+            # weighted average of the cumulative distribution of each Subset
+            cdf = np.zeros(values.size)
+
+            for subset_points, count in zip(node_points, node_counts[valid]):
+                cdf += count * np.interp(values, subset_points, ranks,
+                                         left=0, right=1)
+
+            cdf /= node_counts[valid].sum()
+            edges[dim, node] = np.interp(targets, cdf, values)
+            edges[dim, node, 0] = values[0]
+            edges[dim, node, -1] = values[-1]
+
+    return edges
@@ -0,0 +1,101 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from dislib.data import Subset
+from dislib.data.base import _read_txt
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the time of parsing the blocks of lines of a "
+                    "CSV file with the vectorized parser used by the loaders "
+                    "against the previous per-block np.genfromtxt parser. "
+                    "Blocks are built as load_txt_file does, and are parsed "
+                    "in this process. The comparison is repeated with one "
+                    "missing value per block, which makes the vectorized "
+                    "parser fall back to np.genfromtxt.")
+    parser.add_argument("-n", "--samples", metavar="N_SAMPLES", type=int,
+                        help="default is 1000000", default=1000000)
+    parser.add_argument("-f", "--features", metavar="N_FEATURES", type=int,
+                        help="default is 50", default=50)
+    parser.add_argument("-p", "--part_size", metavar="PART_SIZE", type=int,
+                        help="size of the blocks in lines (default is "
+                             "100000)", default=100000)
+    parser.add_argument("--float32", action="store_true",
+                        help="parse samples in single precision")
+    parser.add_argument("path", type=str,
+                        help="CSV file. It is created with random data if it "
+                             "does not exist")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        _create_file(args.path, args.samples, args.features, args.part_size)
+
+    dtype = np.float32 if args.float32 else np.float64
+    blocks = _read_blocks(args.path, args.part_size)
+    missing_blocks = [[b"," + block[0].split(b",", 1)[1]] + block[1:]
+                      for block in blocks]
+
+    for name, test_blocks in (("complete", blocks),
+                              ("missing", missing_blocks)):
+        old_time, old_subsets = _time(_genfromtxt_lines, test_blocks, dtype)
+        new_time, new_subsets = _time(_parse_lines, test_blocks, dtype)
+
+        for old, new in zip(old_subsets, new_subsets):
+            assert np.array_equal(old.samples, new.samples, equal_nan=True)
+
+        out = [args.path, args.part_size, dtype.__name__, name, old_time,
+               new_time, old_time / new_time]
+
+        print(out)
+
+
+def _time(parse_f, blocks, dtype):
+    s_time = time.time()
+    subsets = [parse_f(lines, dtype) for lines in blocks]
+
+    return time.time() - s_time, subsets
+
+
+def _genfromtxt_lines(lines, dtype):
+    """ Previous parser of the blocks of lines of load_txt_file. """
+    samples = np.genfromtxt(lines, delimiter=",", dtype=dtype)
+
+    if samples.ndim == 1:
+        n_lines = sum(1 for line in lines if line.strip())
+        samples = samples.reshape(n_lines, -1)
+
+    return Subset(samples, copy=False)
+
+
+def _parse_lines(lines, dtype):
+    """ Current parser of the blocks of lines of load_txt_file. """
+    return _read_txt(b"".join(lines), ",", None, dtype)
+
+
+def _read_blocks(path, part_size):
+    blocks = [[]]
+
+    with open(path, "r") as f:
+        for line in f:
+            if len(blocks[-1]) == part_size:
+                blocks.append([])
+
+            blocks[-1].append(line.encode())
+
+    return blocks
+
+
+def _create_file(path, n_samples, n_features, part_size):
+    with open(path, "w") as f:
+        for i in range(0, n_samples, part_size):
+            n_rows = min(part_size, n_samples - i)
+            np.savetxt(f, np.random.random((n_rows, n_features)),
+                       delimiter=",")
+
+
+if __name__ == "__main__":
+    main()
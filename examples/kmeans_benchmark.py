@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+from pycompss.api.api import compss_barrier
+from scipy.sparse import random as sparse_random
+
+from dislib.cluster import KMeans
+from dislib.data import load_data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the throughput of the KMeans iterations in "
+                    "samples per second.")
+    parser.add_argument("-n", "--samples", metavar="N_SAMPLES", type=int,
+                        help="default is 1000000", default=1000000)
+    parser.add_argument("-f", "--features", metavar="N_FEATURES", type=int,
+                        help="default is 50", default=50)
+    parser.add_argument("-k", "--clusters", metavar="N_CLUSTERS", type=int,
+                        help="default is 100", default=100)
+    parser.add_argument("-p", "--part_size", metavar="PART_SIZE", type=int,
+                        help="size of the subsets in samples (default is "
+                             "100000)", default=100000)
+    parser.add_argument("-i", "--iterations", metavar="N_ITERATIONS",
+                        type=int, help="default is 5", default=5)
+    parser.add_argument("--density", metavar="DENSITY", type=float,
+                        help="density of the samples. If lower than 1, "
+                             "samples are stored in CSR format (default is "
+                             "1)", default=1)
+    parser.add_argument("-a", "--algorithm", type=str, default="lloyd",
+                        choices=["lloyd", "hamerly"], help="default is lloyd")
+    args = parser.parse_args()
+
+    if args.density < 1:
+        x = sparse_random(args.samples, args.features, args.density,
+                          format="csr", random_state=0)
+    else:
+        x = np.random.random((args.samples, args.features))
+
+    dataset = load_data(x, args.part_size)
+    compss_barrier()
+
+    kmeans = KMeans(n_clusters=args.clusters, max_iter=args.iterations,
+                    tol=0, random_state=0, algorithm=args.algorithm)
+
+    s_time = time.time()
+    kmeans.fit(dataset)
+    compss_barrier()
+    fit_time = time.time() - s_time
+
+    throughput = args.samples * kmeans.n_iter / fit_time
+    out = [args.samples, args.features, args.clusters, args.part_size,
+           args.density, args.algorithm, kmeans.n_iter, fit_time, throughput]
+
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from dislib.cluster import KMeans
+from dislib.data import Subset, load_npy_file
+from dislib.preprocessing import StandardScaler
+from dislib.utils import train_test_split
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the time and the peak memory of a pipeline "
+                    "(loading a .npy file, splitting it in train and test "
+                    "data, scaling and fitting KMeans) with and without "
+                    "copying the arrays of every Subset. Run it with python "
+                    "instead of runcompss, so that tasks run in this process "
+                    "and their memory is included in the measurements. Each "
+                    "mode runs in a separate process, and memory is measured "
+                    "as the peak resident anonymous memory of the process, "
+                    "which does not include the pages of memory-mapped "
+                    "files.")
+    parser.add_argument("-s", "--size", metavar="SIZE_GB", type=float,
+                        help="size of the dataset in GB (default is 10)",
+                        default=10)
+    parser.add_argument("-f", "--features", metavar="N_FEATURES", type=int,
+                        help="default is 100", default=100)
+    parser.add_argument("-p", "--part_size", metavar="PART_SIZE", type=int,
+                        help="size of the subsets in samples (default is "
+                             "100000)", default=100000)
+    parser.add_argument("--copy", choices=["on", "off"],
+                        help="run a single mode in this process. If not "
+                             "given, both modes run in child processes")
+    parser.add_argument("path", type=str,
+                        help=".npy file with the dataset. It is created with "
+                             "random data if it does not exist")
+    args = parser.parse_args()
+
+    if args.copy is not None:
+        _run_pipeline(args.path, args.part_size, args.copy == "on")
+        return
+
+    n_samples = int(args.size * 2 ** 30 / (8 * args.features))
+
+    if not os.path.exists(args.path):
+        _create_file(args.path, n_samples, args.features, args.part_size)
+
+    for copy in ("on", "off"):
+        subprocess.check_call([sys.executable, __file__, "-p",
+                               str(args.part_size), "--copy", copy,
+                               args.path])
+
+
+def _run_pipeline(path, part_size, copy):
+    if copy:
+        _force_copies()
+
+    monitor = _MemoryMonitor()
+    stages = []
+
+    def stage(name, f):
+        monitor.reset()
+        s_time = time.time()
+        result = f()
+        stages.append((name, time.time() - s_time, monitor.peak()))
+        return result
+
+    def load():
+        dataset = load_npy_file(path, subset_size=part_size)
+        dataset.collect()
+        return dataset
+
+    def scale():
+        StandardScaler().fit_transform(train)
+        train.collect()
+
+    dataset = stage("load", load)
+    train, test = stage("split", lambda: train_test_split(dataset,
+                                                          shuffle=False))
+    train.collect()
+    stage("scale", scale)
+    stage("kmeans", lambda: KMeans(n_clusters=10, max_iter=5,
+                                   random_state=0).fit(train))
+    monitor.stop()
+
+    for name, stage_time, peak in stages:
+        print([copy, name, stage_time, peak / 2 ** 30])
+
+
+def _force_copies():
+    """ Makes every Subset copy its arrays, as before the copy argument
+    existed. """
+    init = Subset.__init__
+
+    def copying_init(self, samples, labels=None, copy=True):
+        init(self, samples, labels, copy=True)
+
+    Subset.__init__ = copying_init
+
+
+class _MemoryMonitor(object):
+    """ Samples the resident anonymous memory of this process in a
+    background thread. """
+
+    def __init__(self, interval=0.01):
+        self._interval = interval
+        self._peak = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def reset(self):
+        self._peak = _anon_rss()
+
+    def peak(self):
+        self._peak = max(self._peak, _anon_rss())
+        return self._peak
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self._interval):
+            self._peak = max(self._peak, _anon_rss())
+
+
+def _anon_rss():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+
+    return 0
+
+
+def _create_file(path, n_samples, n_features, part_size):
+    x = np.lib.format.open_memmap(path, mode="w+", dtype="float64",
+                                  shape=(n_samples, n_features))
+
+    for i in range(0, n_samples, part_size):
+        end = min(i + part_size, n_samples)
+        x[i:end] = np.random.random((end - i, n_features))
+
+    x.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -6,11 +7,16 @@ from scipy.sparse import csr_matrix
 from sklearn.datasets import load_svmlight_file
 from sklearn.datasets import make_blobs
 
-from dislib.data import Subset, Dataset
+from dislib.cluster import GaussianMixture, KMeans
+from dislib.data import Subset, Dataset, SubsetStats, LazySubset
+from dislib.data import load, load_array
+from dislib.data import tree_reduce
 from dislib.data import load_data
 from dislib.data import load_libsvm_file, load_libsvm_files
+from dislib.data import load_npy_file, load_npz_file
 from dislib.data import load_txt_file
 from dislib.data import load_txt_files
+from dislib.preprocessing import StandardScaler
 
 
 class DataLoadingTest(unittest.TestCase):
@@ -88,6 +94,18 @@ class DataLoadingTest(unittest.TestCase):
         self.assertTrue((read_y == y).all())
         self.assertEqual(len(data), 4)
 
+    def test_load_libsvm_file_subset_bytes(self):
+        """ Tests loading a LibSVM file split in byte ranges.
+        """
+        file_ = "tests/files/libsvm/2"
+
+        data = load_libsvm_file(file_, None, 780, subset_bytes=5000)
+        x, y = load_svmlight_file(file_, n_features=780)
+
+        self.assertTrue(np.array_equal(data.samples.toarray(), x.toarray()))
+        self.assertTrue(np.array_equal(data.labels, y))
+        self.assertTrue(data.sparse)
+
     def test_load_libsvm_files_sparse(self):
         """ Tests loading multiple LibSVM files in sparse mode.
         """
@@ -144,6 +162,56 @@ class DataLoadingTest(unittest.TestCase):
         self.assertEqual(len(data), 15)
         self.assertIsNone(subset.labels)
 
+    def test_load_csv_file_subset_bytes(self):
+        """ Tests loading a CSV file split in byte ranges.
+        """
+        csv_file = "tests/files/csv/1"
+
+        data = load_txt_file(csv_file, subset_size=None, n_features=121,
+                             label_col="last", subset_bytes=100000)
+        csv = np.loadtxt(csv_file, delimiter=",")
+        n_ranges = int(np.ceil(os.path.getsize(csv_file) / 100000))
+
+        self.assertTrue(np.array_equal(data.samples, csv[:, :-1]))
+        self.assertTrue(np.array_equal(data.labels, csv[:, -1]))
+        self.assertIn(len(data), (n_ranges - 1, n_ranges))
+
+    def test_load_csv_file_blank_ranges(self):
+        """ Tests loading a CSV file whose last byte ranges only contain
+        blank lines. """
+        x = np.arange(30.).reshape(10, 3)
+        path = os.path.join(tempfile.mkdtemp(), "data.csv")
+
+        with open(path, "w") as f:
+            np.savetxt(f, x, delimiter=",")
+            f.write("\n" * 150 + "   \n")
+
+        for lazy in (False, True):
+            data = load_txt_file(path, subset_size=None, n_features=2,
+                                 label_col="last", subset_bytes=100,
+                                 lazy=lazy)
+
+            self.assertEqual(len(data), 5)
+            self.assertTrue(np.array_equal(data.samples, x[:, :-1]))
+            self.assertTrue(np.array_equal(data.labels, x[:, -1]))
+
+        data = load_txt_file(path, subset_size=5, n_features=2,
+                             label_col="last", lazy=True)
+
+        self.assertEqual(data.subsets_sizes(), [5, 5])
+
+        # blank lines in the middle of the file give empty subsets
+        with open(path, "w") as f:
+            np.savetxt(f, x[:5], delimiter=",")
+            f.write("\n" * 300)
+            np.savetxt(f, x[5:], delimiter=",")
+
+        data = load_txt_file(path, subset_size=None, n_features=2,
+                             label_col="last", subset_bytes=100)
+
+        self.assertTrue(np.array_equal(data.samples, x[:, :-1]))
+        self.assertTrue(np.array_equal(data.labels, x[:, -1]))
+
     def test_load_csv_file_labels_last(self):
         """ Tests loading a CSV file with labels at the last column.
         """
@@ -266,6 +334,180 @@ class DataLoadingTest(unittest.TestCase):
 
         self.assertEqual(len(data), 2)
 
+    def test_load_txt_file_dtype(self):
+        """ Tests loading a text file with missing values and float32
+        output. """
+        x, y = make_blobs(n_samples=100, random_state=0)
+        x[3, 1] = np.nan
+        path = os.path.join(tempfile.mkdtemp(), "data.csv")
+
+        with open(path, "w") as f:
+            for sample, label in zip(x, y):
+                values = ["" if np.isnan(v) else repr(v) for v in sample]
+                f.write(",".join(values + [str(label)]) + "\n")
+
+        data = load_txt_file(path, subset_size=30, n_features=2,
+                             label_col="last", dtype=np.float32)
+
+        self.assertEqual(data.samples.dtype, np.float32)
+        self.assertTrue(np.allclose(data.samples, x, equal_nan=True))
+        self.assertTrue(np.array_equal(data.labels, y))
+
+        data = load_txt_file(path, subset_size=None, n_features=2,
+                             label_col="last", subset_bytes=500)
+
+        self.assertTrue(np.array_equal(data.samples, x, equal_nan=True))
+
+    def test_load_txt_file_ragged(self):
+        """ Tests that loading a text file whose lines have a different
+        number of fields raises an error instead of reshaping the values
+        into wrong rows. """
+        path = os.path.join(tempfile.mkdtemp(), "data.csv")
+
+        with open(path, "w") as f:
+            f.write("1,2,3\n4,5\n6,7,8,9\n")
+
+        with self.assertRaises(ValueError):
+            load_txt_file(path, subset_size=10, n_features=3).samples
+
+    def test_load_npy_file(self):
+        """ Tests loading a .npy file with labels in another .npy file. """
+        x, y = make_blobs(n_samples=1050, random_state=0)
+        tmp_dir = tempfile.mkdtemp()
+        x_path = os.path.join(tmp_dir, "x.npy")
+        y_path = os.path.join(tmp_dir, "y.npy")
+        np.save(x_path, x)
+        np.save(y_path, y)
+
+        data = load_npy_file(x_path, subset_size=100, labels_path=y_path)
+
+        self.assertTrue(np.array_equal(data.samples, x))
+        self.assertTrue(np.array_equal(data.labels, y))
+        self.assertEqual(len(data), 11)
+        self.assertEqual(data.subset_size(10), 50)
+
+        data = load_npy_file(x_path, subset_size=100)
+
+        self.assertTrue(np.array_equal(data.samples, x))
+        self.assertIsNone(data.labels)
+
+    def test_load_npz_file(self):
+        """ Tests loading the arrays of an uncompressed .npz file. """
+        x, y = make_blobs(n_samples=1050, random_state=0)
+        path = os.path.join(tempfile.mkdtemp(), "data.npz")
+        np.savez(path, samples=np.asfortranarray(x), labels=y)
+
+        data = load_npz_file(path, subset_size=300, samples_key="samples",
+                             labels_key="labels")
+
+        self.assertTrue(np.array_equal(data.samples, x))
+        self.assertTrue(np.array_equal(data.labels, y))
+        self.assertEqual(len(data), 4)
+
+        path = os.path.join(tempfile.mkdtemp(), "data.npz")
+        np.savez_compressed(path, x=x)
+
+        with self.assertRaises(ValueError):
+            load_npz_file(path, subset_size=300)
+
+    def test_load_lazy(self):
+        """ Tests loading files into LazySubsets. """
+        x, y = make_blobs(n_samples=105, random_state=0)
+        tmp_dir = tempfile.mkdtemp()
+        npy_path = os.path.join(tmp_dir, "x.npy")
+        csv_path = os.path.join(tmp_dir, "x.csv")
+        np.save(npy_path, x)
+        np.savetxt(csv_path, np.column_stack((x, y)), delimiter=",")
+
+        datasets = [load_npy_file(npy_path, subset_size=20, lazy=True),
+                    load_txt_file(csv_path, 20, 2, label_col="last",
+                                  lazy=True),
+                    load_txt_file(csv_path, None, 2, label_col="last",
+                                  subset_bytes=1000, lazy=True)]
+
+        for data in datasets:
+            self.assertTrue(all(isinstance(s, LazySubset) for s in data))
+            self.assertTrue(np.allclose(data.samples, x))
+
+        self.assertEqual(datasets[0].subsets_sizes(), [20] * 5 + [5])
+        self.assertEqual(datasets[1].subsets_sizes(), [20] * 5 + [5])
+        self.assertTrue(np.array_equal(datasets[1].labels, y))
+
+    def test_estimators_lazy(self):
+        """ Tests that estimators give the same results on lazily and
+        eagerly loaded datasets. """
+        x, y = make_blobs(n_samples=300, random_state=0)
+        path = os.path.join(tempfile.mkdtemp(), "x.npy")
+        np.save(path, x)
+
+        def load(lazy):
+            return load_npy_file(path, subset_size=50, lazy=lazy)
+
+        eager_km = KMeans(n_clusters=3, random_state=0)
+        lazy_km = KMeans(n_clusters=3, random_state=0)
+        eager_data, lazy_data = load(False), load(True)
+        self.assertTrue(all(isinstance(s, LazySubset) for s in lazy_data))
+
+        eager_km.fit_predict(eager_data)
+        lazy_km.fit_predict(lazy_data)
+
+        self.assertTrue(np.allclose(eager_km.centers, lazy_km.centers))
+        self.assertTrue(np.array_equal(eager_data.labels, lazy_data.labels))
+
+        eager_gm = GaussianMixture(n_components=3, random_state=0)
+        lazy_gm = GaussianMixture(n_components=3, random_state=0)
+        eager_gm.fit(load(False))
+        lazy_gm.fit(load(True))
+
+        self.assertTrue(np.allclose(eager_gm.weights_, lazy_gm.weights_))
+        self.assertTrue(np.allclose(eager_gm.means_, lazy_gm.means_))
+        self.assertTrue(np.allclose(eager_gm.covariances_,
+                                    lazy_gm.covariances_))
+
+        eager_sc, lazy_sc = StandardScaler(), StandardScaler()
+        eager_data, lazy_data = load(False), load(True)
+        eager_sc.fit_transform(eager_data)
+        lazy_sc.fit_transform(lazy_data)
+
+        self.assertTrue(np.allclose(eager_sc.mean_, lazy_sc.mean_))
+        self.assertTrue(np.allclose(eager_sc.var_, lazy_sc.var_))
+        self.assertTrue(np.allclose(eager_data.samples, lazy_data.samples))
+
+    def test_save_load(self):
+        """ Tests saving a Dataset and loading it back. """
+        x, y = make_blobs(n_samples=105, random_state=0)
+        x[x < 0] = 0
+
+        for data in (x, csr_matrix(x)):
+            path = os.path.join(tempfile.mkdtemp(), "dataset")
+            dataset = load_data(data, subset_size=20, y=y)
+            dataset.append(Subset(data[:5]))
+            dataset.save(path)
+
+            loaded = load(path)
+            samples = loaded.samples
+
+            self.assertEqual(loaded.sparse, dataset.sparse)
+            self.assertEqual(loaded.n_features, 2)
+            self.assertEqual(loaded.subsets_sizes(), [20] * 5 + [5, 5])
+            self.assertIsNone(loaded[6].labels)
+            self.assertTrue(np.array_equal(loaded.labels, y))
+            self.assertTrue(np.array_equal(loaded.min_features(),
+                                           x.min(axis=0)))
+            self.assertTrue(np.array_equal(loaded.max_features(),
+                                           x.max(axis=0)))
+
+            if loaded.sparse:
+                samples = samples.toarray()
+
+            self.assertTrue(np.array_equal(samples, np.vstack([x, x[:5]])))
+
+        with self.assertRaises(ValueError):
+            with open(os.path.join(path, "manifest.json"), "w") as f:
+                f.write("{}")
+
+            load(path)
+
 
 class DatasetTest(unittest.TestCase):
     def test_get_item(self):
@@ -321,6 +563,32 @@ class DatasetTest(unittest.TestCase):
         self.assertEqual(dataset.samples.shape[0], 4179)
         self.assertEqual(dataset.labels.shape[0], 4179)
 
+    def test_samples_many_subsets(self):
+        """ Tests Dataset.samples and Dataset.labels with many dense and
+        sparse subsets of different sizes. """
+        x, y = make_blobs(n_samples=1013, random_state=0)
+        dense = load_data(x=x, y=y, subset_size=7)
+
+        self.assertTrue(np.array_equal(dense.samples, x))
+        self.assertTrue(np.array_equal(dense.labels, y))
+
+        x_sp = csr_matrix(np.where(x > 0, x, 0))
+        sparse = load_data(x=x_sp, subset_size=7)
+        samples = sparse.samples
+
+        self.assertEqual(samples.format, "csr")
+        self.assertTrue(np.array_equal(samples.toarray(), x_sp.toarray()))
+
+    def test_iter_blocks(self):
+        """ Tests iterating over the blocks of a Dataset. """
+        x, y = make_blobs(n_samples=100, random_state=0)
+        dataset = load_data(x=x, y=y, subset_size=30)
+        blocks = list(dataset.iter_blocks())
+
+        self.assertEqual(len(blocks), 4)
+        self.assertTrue(np.array_equal(blocks[1][0], x[30:60]))
+        self.assertTrue(np.array_equal(blocks[3][1], y[90:]))
+
     def test_empty_labels(self):
         """ Tests the access Dataset.labels for unlabeled datasets """
         csv_file = "tests/files/csv/3"
@@ -350,6 +618,34 @@ class DatasetTest(unittest.TestCase):
         self.assertTrue(np.array_equal(min_, np.array([0, 1])))
         self.assertTrue(np.array_equal(max_, np.array([9, 9])))
 
+    def test_min_max_features_append(self):
+        """ Tests that min_features and max_features are updated when
+        appending Subsets after computing them. """
+        dataset = load_data(np.array([[1, 2], [4, 5], [2, 2]]), 2)
+
+        self.assertTrue(np.array_equal(dataset.min_features(), [1, 2]))
+
+        dataset.append(Subset(np.array([[0, 8], [9, 3]])))
+        dataset.append(Subset(np.array([[5, 5]])),
+                       stats=SubsetStats.from_samples(np.array([[5, 5]])))
+
+        self.assertTrue(np.array_equal(dataset.min_features(), [0, 2]))
+        self.assertTrue(np.array_equal(dataset.max_features(), [9, 8]))
+
+    def test_loaders_fill_stats(self):
+        """ Tests that loaders provide the sizes and statistics of the
+        Subsets. """
+        x, _ = make_blobs(n_samples=1050, random_state=0)
+        path = os.path.join(tempfile.mkdtemp(), "x.npy")
+        np.save(path, x)
+
+        data = load_npy_file(path, subset_size=100)
+
+        self.assertTrue(all(stats is not None for stats in data._stats))
+        self.assertEqual(data.subsets_sizes(), [100] * 10 + [50])
+        self.assertTrue(np.array_equal(data.min_features(), x.min(axis=0)))
+        self.assertTrue(np.array_equal(data.max_features(), x.max(axis=0)))
+
     def test_min_max_features_sparse(self):
         """ Tests that min_features and max_features correctly return min
         and max values with sparse dataset. """
@@ -465,6 +761,75 @@ class DatasetTest(unittest.TestCase):
         self.assertTrue(dataset_t.labels is None)
         self.assertEqual(dataset_t.subsets_sizes(), [4, 4])
 
+        for subset in dataset_t:
+            self.assertEqual(subset.samples.format, "csr")
+
+        # Transpose with a number of subsets that does not divide n_features
+        dataset_t = dataset.transpose(n_subsets=3)
+
+        self.assertTrue(
+            np.allclose(dataset_t.samples.toarray(), data_t.toarray()))
+        self.assertEqual(dataset_t.subsets_sizes(), [2, 2, 4])
+
+    def test_map_blocks(self):
+        """ Tests Dataset.map_blocks returning Datasets and lists. """
+        x = np.random.random((10, 3))
+        y = np.arange(10)
+        dataset = load_data(x, subset_size=4, y=y)
+
+        mapped = dataset.map_blocks(lambda s, lb: s * 2)
+
+        self.assertTrue(np.array_equal(mapped.samples, x * 2))
+        self.assertIsNone(mapped.labels)
+        self.assertEqual(mapped.subsets_sizes(), [4, 4, 2])
+
+        mapped = dataset.map_blocks(lambda s, lb: (s[:, :1], lb + 1),
+                                    n_features=1)
+
+        self.assertEqual(mapped.n_features, 1)
+        self.assertTrue(np.array_equal(mapped.samples, x[:, :1]))
+        self.assertTrue(np.array_equal(mapped.labels, y + 1))
+
+        sums = dataset.map_blocks(lambda s, lb: lb.sum(), return_dataset=False)
+
+        self.assertEqual(sums, [6, 22, 17])
+
+        applied = dataset._apply(np.sum, return_dataset=True)
+
+        self.assertTrue(np.allclose(applied.samples[:, 0], x.sum(axis=1)))
+
+    def test_cache(self):
+        """ Tests that Dataset.cache returns an equivalent Dataset of
+        LazySubsets. """
+        x, y = make_blobs(n_samples=105, random_state=0)
+        dataset = load_data(x, subset_size=20, y=y)
+        path = os.path.join(tempfile.mkdtemp(), "cache")
+
+        cached = dataset.cache(path, cache_bytes=2 ** 20)
+
+        self.assertTrue(all(isinstance(s, LazySubset) for s in cached))
+        self.assertEqual(cached.subsets_sizes(), dataset.subsets_sizes())
+        self.assertTrue(np.array_equal(cached.samples, x))
+        self.assertTrue(np.array_equal(cached.labels, y))
+        self.assertTrue(np.array_equal(cached.min_features(), x.min(axis=0)))
+
+    def test_cache_overwrite(self):
+        """ Tests that caching a Dataset to the path of a previously cached
+        Dataset does not return the Subsets of the old one. """
+        path = os.path.join(tempfile.mkdtemp(), "cache")
+
+        zeros = load_data(np.zeros((20, 1)), subset_size=10)
+        cached = zeros.cache(path, cache_bytes=2 ** 20)
+
+        self.assertEqual(cached.samples.sum(), 0)
+
+        ones = load_data(np.ones((20, 1)), subset_size=10)
+        cached = ones.cache(path, cache_bytes=2 ** 20)
+
+        self.assertEqual(cached.samples.sum(), 20)
+        self.assertEqual(load(path, lazy=True, cache_bytes=2 ** 20)
+                         .samples.sum(), 20)
+
     def test_subsets_sizes(self):
         """ Tests Dataset.subsets_sizes() returns the correct subset sizes."""
 
@@ -496,6 +861,251 @@ class DatasetTest(unittest.TestCase):
         self.assertTrue(dense.subsets_sizes(), [1] * 100)
 
 
+class TreeReduceTest(unittest.TestCase):
+    def test_order_and_balance(self):
+        """ Tests that tree_reduce preserves the order of the partial
+        results and builds a balanced tree. """
+        def leaf_depths(node, depth=0):
+            if not isinstance(node, tuple):
+                return [(node, depth)]
+
+            self.assertTrue(2 <= len(node) <= arity)
+            return [leaf for child in node
+                    for leaf in leaf_depths(child, depth + 1)]
+
+        for arity in range(2, 6):
+            for n_partials in range(2, 30):
+                tree = tree_reduce(range(n_partials), lambda *p: p, arity)
+                leaves, depths = zip(*leaf_depths(tree))
+
+                self.assertEqual(leaves, tuple(range(n_partials)))
+                self.assertLessEqual(max(depths) - min(depths), 1)
+                self.assertEqual(max(depths),
+                                 np.ceil(np.log(n_partials) / np.log(arity)
+                                         - 1e-9))
+
+        groups = []
+
+        def combine(*partials):
+            groups.append(len(partials))
+            return "".join(partials)
+
+        partials = [chr(ord("a") + i) for i in range(5)]
+
+        self.assertEqual(tree_reduce(partials, combine, arity=2), "abcde")
+        self.assertEqual(groups, [2, 2, 2, 2])
+
+        self.assertEqual(tree_reduce(["a"], combine, arity=3), "a")
+        self.assertEqual(tree_reduce(["a"], combine, root_f=str.upper), "A")
+
+    def test_auto_arity(self):
+        """ Tests the arity chosen from the number and the size of the
+        partial results. """
+        groups = []
+
+        def combine(*partials):
+            groups.append(len(partials))
+            return sum(partials)
+
+        self.assertEqual(tree_reduce(range(100), combine), 4950)
+        self.assertEqual(max(groups), 10)
+
+        groups.clear()
+        tree_reduce(range(100), combine, partial_nbytes=2 ** 27)
+        self.assertEqual(max(groups), 2)
+
+    def test_dataset_tree_reduce(self):
+        """ Tests Dataset.tree_reduce. """
+        x = np.random.random((100, 3))
+        dataset = load_data(x, subset_size=7)
+
+        result = dataset.tree_reduce(lambda s, lb: s.sum(axis=0),
+                                     lambda *p: np.sum(p, axis=0), arity=2)
+
+        self.assertTrue(np.allclose(result, x.sum(axis=0)))
+
+
+class ArrayTest(unittest.TestCase):
+    def test_transpose(self):
+        """ Tests Array.transpose with dense and sparse blocks. """
+        x = np.random.random((10, 7))
+
+        for data in (x, csr_matrix(x)):
+            array = load_array(data, (3, 2))
+            array_t = array.transpose()
+            collected = array_t.collect()
+
+            self.assertEqual(array_t.shape, (7, 10))
+            self.assertEqual(array_t.n_blocks, (4, 4))
+            self.assertEqual(array_t.sparse, array.sparse)
+            self.assertEqual(array_t.sparse, isinstance(collected, csr_matrix))
+
+            if array.sparse:
+                collected = collected.toarray()
+
+            self.assertTrue(np.array_equal(collected, x.T))
+
+    def test_transpose_view(self):
+        """ Tests that a transposed Array is a view of the same blocks that
+        supports slicing, reductions and conversion to a Dataset. """
+        x = np.random.random((10, 7))
+
+        for data in (x, csr_matrix(x)):
+            array = load_array(data, (3, 2))
+            array_t = array.transpose()
+
+            self.assertIs(array_t.transpose().get_block(1, 2),
+                          array.get_block(1, 2))
+
+            block = array_t.get_block(2, 1)
+
+            if array.sparse:
+                self.assertIsInstance(block, csr_matrix)
+                block = block.toarray()
+
+            self.assertTrue(np.array_equal(block, x[3:6, 4:6].T))
+
+            sliced = array_t[1:6, 2:9].collect()
+
+            if array.sparse:
+                sliced = sliced.toarray()
+
+            self.assertTrue(np.array_equal(sliced, x.T[1:6, 2:9]))
+
+            for axis in (0, 1):
+                self.assertTrue(np.allclose(array_t.sum(axis).collect(),
+                                            x.T.sum(axis, keepdims=True)))
+
+            dataset = array_t.to_dataset()
+            samples = dataset.samples
+
+            if dataset.sparse:
+                samples = samples.toarray()
+
+            self.assertEqual(dataset.subsets_sizes(), [2, 2, 2, 1])
+            self.assertTrue(np.array_equal(samples, x.T))
+
+    def test_get_item(self):
+        """ Tests slicing an Array. """
+        x = np.arange(70).reshape(10, 7)
+        array = load_array(x, (3, 2))
+
+        sliced = array[2:9, 1:]
+        self.assertEqual(sliced.shape, (7, 6))
+        self.assertEqual(sliced.n_blocks, (3, 4))
+        self.assertTrue(np.array_equal(sliced.collect(), x[2:9, 1:]))
+
+        sliced = array[3:6]
+        self.assertIs(sliced.get_block(0, 1), array.get_block(1, 1))
+        self.assertTrue(np.array_equal(sliced.collect(), x[3:6]))
+
+        sliced = array[-1, 4]
+        self.assertTrue(np.array_equal(sliced.collect(), [[x[-1, 4]]]))
+
+    def test_reductions(self):
+        """ Tests the sum, min and max of an Array along both axes. """
+        x = np.random.random((10, 7)) - 0.5
+
+        for data in (x, csr_matrix(x)):
+            array = load_array(data, (3, 2))
+
+            for axis in (0, 1):
+                self.assertTrue(np.allclose(array.sum(axis).collect(),
+                                            x.sum(axis, keepdims=True)))
+                self.assertTrue(np.array_equal(array.min(axis).collect(),
+                                               x.min(axis, keepdims=True)))
+                self.assertTrue(np.array_equal(array.max(axis).collect(),
+                                               x.max(axis, keepdims=True)))
+
+    def test_dataset_conversion(self):
+        """ Tests converting a Dataset to an Array and back. """
+        x = np.random.random((10, 7))
+
+        for data in (x, csr_matrix(x)):
+            dataset = load_data(data, subset_size=4)
+
+            array = dataset.to_array(col_block_size=3)
+            self.assertEqual(array.n_blocks, (3, 3))
+            self.assertEqual(array.shape, (10, 7))
+
+            dataset = array.to_dataset()
+            self.assertEqual(dataset.subsets_sizes(), [4, 4, 2])
+            self.assertEqual(dataset.sparse, array.sparse)
+
+            samples = dataset.samples
+
+            if dataset.sparse:
+                samples = samples.toarray()
+
+            self.assertTrue(np.array_equal(samples, x))
+
+            array = load_data(data, subset_size=4).to_array()
+            self.assertEqual(array.n_blocks, (3, 1))
+
+
+class LazySubsetTest(unittest.TestCase):
+    def test_load_on_access(self):
+        """ Tests that LazySubset loads data when accessed and does not
+        serialize it. """
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return Subset(np.ones((4, 2)), np.zeros(4))
+
+        subset = LazySubset(loader)
+        self.assertEqual(len(calls), 0)
+        self.assertEqual(subset.samples.shape, (4, 2))
+        self.assertEqual(subset.labels.shape, (4,))
+        self.assertEqual(len(calls), 1)
+
+        subset.set_label(1, 5)
+        state = subset.__getstate__()
+
+        self.assertIsNone(state["_subset"])
+        self.assertTrue(np.array_equal(state["_labels"], [0, 5, 0, 0]))
+        self.assertEqual(subset._load().labels[1], 0)
+
+    def test_cache(self):
+        """ Tests the per-process LRU cache of LazySubset. """
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return Subset(np.ones((10, 10)))
+
+        for key in ("a", "b", "a", "c", "a", "b"):
+            LazySubset(loader, key, cache_bytes=1600).samples
+
+        # "b" is evicted by "c", and "a" is always used again
+        self.assertEqual(len(calls), 4)
+
+
+class SubsetStatsTest(unittest.TestCase):
+    def test_merge(self):
+        """ Tests that merged statistics match the statistics of the
+        concatenated samples. """
+        x = np.random.RandomState(0).normal(1e4, 1, size=(100, 3))
+        x[x < 1e4] = 0
+        expected = SubsetStats.from_samples(x)
+
+        for sparse in (False, True):
+            samples = csr_matrix(x) if sparse else x
+            stats = SubsetStats.from_samples(samples[:0])
+            parts = [samples[:0], samples[:10], samples[10:80], samples[80:]]
+
+            for part in parts:
+                stats = stats.merge(SubsetStats.from_samples(part))
+
+            self.assertEqual(stats.n_samples, 100)
+            self.assertEqual(stats.nnz, np.count_nonzero(x))
+            self.assertTrue(np.array_equal(stats.min, x.min(axis=0)))
+            self.assertTrue(np.array_equal(stats.max, x.max(axis=0)))
+            self.assertTrue(np.allclose(stats.mean, x.mean(axis=0)))
+            self.assertTrue(np.allclose(stats.var, x.var(axis=0)))
+            self.assertTrue(np.allclose(stats.var, expected.var))
+
+
 class SubsetTest(unittest.TestCase):
     def test_concatenate_dense(self):
         """ Tests the concatenation of two dense Subsets. """
@@ -534,6 +1144,42 @@ class SubsetTest(unittest.TestCase):
         subset.set_label(15, 3)
 
         self.assertEqual(subset.labels[15], 3)
+        self.assertTrue(np.isnan(subset.labels[0]))
+        self.assertNotEqual(subset.labels.dtype, object)
+
+        subset.set_label(0, 1000)
+        subset.set_label(1, 0.5)
+
+        self.assertEqual(subset.labels[0], 1000)
+        self.assertEqual(subset.labels[1], 0.5)
+
+    def test_set_label_unset(self):
+        """ Tests that unset labels differ from a real -1 label.
+        """
+        subset = Subset(samples=np.random.random((3, 2)))
+        subset.set_label(0, -1)
+        subset.set_label(2, 1)
+
+        self.assertEqual(subset.labels[0], -1)
+        self.assertTrue(np.isnan(subset.labels[1]))
+        self.assertEqual(subset.labels[2], 1)
+        self.assertEqual(np.count_nonzero(subset.labels == -1), 1)
+
+    def test_set_labels(self):
+        """ Tests that integer labels are stored with a compact dtype.
+        """
+        subset = Subset(samples=np.random.random((25, 8)))
+        subset.set_labels(np.arange(25))
+
+        self.assertEqual(subset.labels.dtype, np.uint8)
+        self.assertTrue(np.array_equal(subset.labels, np.arange(25)))
+
+        subset.set_labels(np.linspace(0, 1, 25))
+
+        self.assertEqual(subset.labels.dtype, np.float64)
+
+        with self.assertRaises(AssertionError):
+            subset.set_labels(np.arange(10))
 
     def test_get_item(self):
         """ Tests Subset's item getter.
@@ -543,6 +1189,48 @@ class SubsetTest(unittest.TestCase):
 
         self.assertTrue((item.samples == np.array(range(10, 20))).all())
 
+    def test_copy_flag(self):
+        """ Tests that Subsets only reference their input arrays if
+        copy=False.
+        """
+        samples = np.random.random((10, 2))
+        labels = np.arange(10)
+
+        subset = Subset(samples, labels)
+
+        self.assertFalse(np.shares_memory(subset.samples, samples))
+        self.assertFalse(np.shares_memory(subset.labels, labels))
+
+        subset = Subset(samples, labels, copy=False)
+
+        self.assertIs(subset.samples, samples)
+        self.assertIs(subset.labels, labels)
+
+        subset_copy = subset.copy()
+
+        self.assertFalse(np.shares_memory(subset_copy.samples, samples))
+        self.assertFalse(np.shares_memory(subset_copy.labels, labels))
+
+    def test_get_item_copies_views(self):
+        """ Tests that Subset's item getter does not return views of the
+        original arrays.
+        """
+        subset = Subset(samples=np.random.random((10, 2)),
+                        labels=np.arange(10))
+        item = subset[2:5]
+        item.samples[0, 0] = -1
+        item.set_label(0, -1)
+
+        self.assertNotEqual(subset.samples[2, 0], -1)
+        self.assertNotEqual(subset.labels[2], -1)
+        self.assertTrue(np.array_equal(subset[[1, 3]].labels, [1, 3]))
+
+        sparse_subset = Subset(samples=csr_matrix(np.ones((10, 2))))
+        item = sparse_subset[2:5]
+        item.samples.data[:] = -1
+
+        self.assertEqual(sparse_subset.samples.min(), 1)
+
     def test_get_item_with_labels(self):
         """ Tests Subset's item getter with labeled samples.
         """
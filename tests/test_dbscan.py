@@ -143,6 +143,25 @@ class DBSCANTest(unittest.TestCase):
         dbscan.fit(dataset)
         self.assertEqual(dbscan.n_clusters, 3)
 
+    def test_adaptive_binning(self):
+        """ Tests that DBSCAN finds the same clusters with quantile and k-d
+        regions as with uniform regions on skewed data.
+        """
+        x, y = make_blobs(n_samples=1500, n_features=2, random_state=8)
+        x = StandardScaler().fit_transform(x)
+        x[:, 0] = np.exp(x[:, 0])
+        labels = []
+
+        for binning in ("uniform", "quantile", "kd"):
+            dbscan = DBSCAN(n_regions=4, eps=.3, binning=binning)
+            dataset = load_data(x=x, y=y, subset_size=300)
+            dbscan.fit(dataset)
+            self.assertEqual(dbscan.n_clusters, 3)
+            labels.append(dataset.labels)
+
+        for other in labels[1:]:
+            self.assertTrue(np.array_equal(labels[0], other))
+
     def test_n_clusters_circles_grid(self):
         """ Tests that DBSCAN finds the correct number of clusters when
         setting n_regions > 1 with circle data.
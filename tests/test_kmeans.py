@@ -1,9 +1,10 @@
 import unittest
 
 import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.datasets import make_blobs
 
-from dislib.cluster import KMeans
+from dislib.cluster import KMeans, MiniBatchKMeans
 from dislib.data import Dataset
 from dislib.data import Subset
 from dislib.data import load_data, load_libsvm_file
@@ -82,6 +83,113 @@ class KMeansTest(unittest.TestCase):
         self.assertTrue((centers == kmeans.centers).all())
         self.assertEqual(labels.size, 610)
 
+    def test_init_kmeans_parallel(self):
+        """ Tests that k-means|| initialization finds the centers of
+        separated blobs far from [0, 1) in a few iterations. """
+        x, y = make_blobs(n_samples=3000, centers=5, random_state=3,
+                          center_box=(-100, 100))
+        true_centers = np.array([x[y == i].mean(axis=0) for i in range(5)])
+        dataset = load_data(x, subset_size=300)
+
+        kmeans = KMeans(n_clusters=5, max_iter=100, random_state=0,
+                        init="k-means||")
+        kmeans.fit_predict(dataset)
+
+        centers = kmeans.centers[np.argsort(kmeans.centers[:, 0])]
+        true_centers = true_centers[np.argsort(true_centers[:, 0])]
+
+        self.assertTrue(np.allclose(centers, true_centers))
+        self.assertLessEqual(kmeans.n_iter, 3)
+        self.assertEqual(np.unique(dataset.labels).size, 5)
+
+        with self.assertRaises(ValueError):
+            KMeans(init="invalid").fit(dataset)
+
+    def test_hamerly(self):
+        """ Tests that Hamerly's algorithm produces the same centers and
+        labels as Lloyd's with dense and sparse data. """
+        x, _ = make_blobs(n_samples=3000, centers=30, n_features=5,
+                          random_state=0)
+        x[np.abs(x) < 2] = 0
+
+        for data in (x, csr_matrix(x)):
+            results = []
+
+            for algorithm in ("lloyd", "hamerly"):
+                dataset = load_data(data, subset_size=300)
+                kmeans = KMeans(n_clusters=20, max_iter=20, tol=0,
+                                random_state=0, init="k-means||",
+                                algorithm=algorithm)
+                kmeans.fit_predict(dataset)
+                centers = kmeans.centers
+
+                if dataset.sparse:
+                    centers = centers.toarray()
+
+                results.append((centers, dataset.labels))
+
+            self.assertTrue(np.array_equal(results[0][0], results[1][0]))
+            self.assertTrue(np.array_equal(results[0][1], results[1][1]))
+
+        with self.assertRaises(ValueError):
+            KMeans(algorithm="invalid").fit(dataset)
+
+    def test_sync_interval(self):
+        """ Tests that synchronizing every few iterations does not change the
+        results, and that check_convergence=False runs max_iter iterations.
+        """
+        x, _ = make_blobs(n_samples=3000, centers=10, random_state=0)
+        results = []
+
+        for sync_interval in (1, 4, 50):
+            dataset = load_data(x, subset_size=300)
+            kmeans = KMeans(n_clusters=10, max_iter=100, random_state=0,
+                            sync_interval=sync_interval)
+            kmeans.fit_predict(dataset)
+            results.append((kmeans.centers, dataset.labels, kmeans.n_iter))
+
+        for centers, labels, n_iter in results[1:]:
+            self.assertTrue(np.array_equal(centers, results[0][0]))
+            self.assertTrue(np.array_equal(labels, results[0][1]))
+            self.assertEqual(n_iter, results[0][2])
+
+        kmeans = KMeans(n_clusters=10, max_iter=7, random_state=0,
+                        check_convergence=False)
+        kmeans.fit(load_data(x, subset_size=300))
+
+        self.assertEqual(kmeans.n_iter, 7)
+
+    def test_mini_batch(self):
+        """ Tests that MiniBatchKMeans finds the centers of separated blobs
+        with fit and with partial_fit on chunks of the data. """
+        x, y = make_blobs(n_samples=4000, centers=4, random_state=3,
+                          center_box=(-50, 50))
+        true_centers = np.array([x[y == i].mean(axis=0) for i in range(4)])
+        true_centers = true_centers[np.argsort(true_centers[:, 0])]
+
+        dataset = load_data(x, subset_size=500)
+        kmeans = MiniBatchKMeans(n_clusters=4, batch_size=200, max_iter=30,
+                                 random_state=0, init="k-means||")
+        kmeans.fit_predict(dataset)
+        centers = kmeans.centers[np.argsort(kmeans.centers[:, 0])]
+
+        self.assertTrue(np.allclose(centers, true_centers, atol=0.5))
+        self.assertEqual(kmeans.n_iter, 30)
+        self.assertEqual(kmeans.counts.sum(), 6000)
+        self.assertEqual(np.unique(dataset.labels).size, 4)
+
+        kmeans = MiniBatchKMeans(n_clusters=4, random_state=0,
+                                 init="k-means||")
+
+        for start in range(0, 4000, 1000):
+            kmeans.partial_fit(load_data(x[start:start + 1000], 250))
+
+        centers = kmeans.centers[np.argsort(kmeans.centers[:, 0])]
+
+        self.assertTrue(np.allclose(centers, true_centers, atol=0.5))
+        self.assertEqual(kmeans.n_iter, 4)
+        self.assertEqual(kmeans.counts.sum(), 4000)
+
     def test_sparse(self):
         """ Tests K-means produces the same results using dense and sparse
         data structures. """
@@ -100,6 +208,24 @@ class KMeansTest(unittest.TestCase):
         self.assertTrue(np.allclose(sparse_c, dense_c))
         self.assertTrue(np.array_equal(sparse.labels, dense.labels))
 
+    def test_sparse_random(self):
+        """ Tests K-means produces the same results using dense and sparse
+        random data. """
+        x = np.random.RandomState(0).random_sample((500, 20))
+        x[x < 0.7] = 0
+
+        dense = load_data(x, subset_size=50)
+        sparse = load_data(csr_matrix(x), subset_size=50)
+
+        kmeans = KMeans(n_clusters=4, random_state=1)
+        kmeans.fit_predict(sparse)
+        sparse_c = kmeans.centers.toarray()
+
+        kmeans.fit_predict(dense)
+
+        self.assertTrue(np.allclose(sparse_c, kmeans.centers))
+        self.assertTrue(np.array_equal(sparse.labels, dense.labels))
+
 
 def main():
     unittest.main()
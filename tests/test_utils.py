@@ -4,7 +4,8 @@ import numpy as np
 from scipy.sparse import csr_matrix
 
 from dislib.data import Subset, Dataset, load_libsvm_file, load_data
-from dislib.utils import as_grid, shuffle, resample
+from dislib.utils import as_grid, shuffle, resample, train_test_split, \
+    KFold, StratifiedKFold
 
 
 class UtilsTest(unittest.TestCase):
@@ -22,7 +23,6 @@ class UtilsTest(unittest.TestCase):
 
         dataset = Dataset(2)
         dataset.extend([s1, s2, s3])
-        dataset._sizes = [2, 3, 4]
 
         shuffled = shuffle(dataset)
         shuffled.collect()
@@ -34,7 +34,7 @@ class UtilsTest(unittest.TestCase):
             total_size += subset.samples.shape[0]
             self.assertFalse(equal)
 
-        self.assertEqual(total_size, 9)
+        self.assertEqual(total_size, 11)
 
     def test_as_grid(self):
         """ Tests the as_grid method with toy data."""
@@ -118,6 +118,24 @@ class UtilsTest(unittest.TestCase):
         self.assertTrue(np.array_equal(all_samples, true_samples))
         self.assertTrue(np.array_equal(all_labels, true_labels))
 
+    def test_as_grid_binning(self):
+        """ Tests that quantile and kd binning balance the number of samples
+        of each region with skewed data.
+        """
+        x = np.random.RandomState(0).lognormal(size=(1200, 2))
+        dataset = load_data(x, subset_size=100)
+
+        uniform = as_grid(dataset, n_regions=3)
+        quantile = as_grid(dataset, n_regions=3, binning="quantile")
+        kd, indices = as_grid(dataset, n_regions=3, return_indices=True,
+                              binning="kd")
+
+        self.assertGreater(max(uniform.subsets_sizes()), 800)
+        self.assertTrue(np.allclose(np.sum(quantile.subsets_sizes()[:3]),
+                                    400, atol=20))
+        self.assertTrue(np.allclose(kd.subsets_sizes(), 1200 / 9, atol=20))
+        self.assertTrue(np.array_equal(kd.samples[indices], x))
+
     def test_as_grid_sizes(self):
         """
         Tests whether as_grid correctly sets subset sizes, and that sizes
@@ -263,6 +281,10 @@ class UtilsTest(unittest.TestCase):
 
         self.assertTrue(np.array_equal(r5.samples, r6.samples))
 
+        r7 = resample(dataset, 500, 5)
+
+        self.assertTrue(np.array_equal(r5.samples, r7.samples))
+
     def test_resample_empty(self):
         """ Tests resample with empty subsets """
         dataset = load_data(np.random.random((1000, 500)), subset_size=100)
@@ -271,6 +293,39 @@ class UtilsTest(unittest.TestCase):
         self.assertEqual(r1.samples.shape[0], 1)
         self.assertEqual(len(r1), 1)
 
+    def test_resample_options(self):
+        """ Tests resample without replacement and with weights """
+        x = np.arange(1000).reshape(-1, 1)
+        dataset = load_data(x, subset_size=100)
+
+        r1 = resample(dataset, n_samples=1000, replace=False, random_state=0)
+
+        self.assertTrue(np.array_equal(np.sort(r1.samples[:, 0]), x[:, 0]))
+
+        weights = np.zeros(1000)
+        weights[150:160] = 1
+        r2 = resample(dataset, n_samples=50, weights=weights)
+
+        self.assertEqual(len(r2), 1)
+        self.assertTrue(np.all(r2.samples >= 150))
+        self.assertTrue(np.all(r2.samples < 160))
+
+    def test_resample_empty_subset_weights(self):
+        """ Tests resample with weights and an empty subset """
+        x = np.arange(20).reshape(-1, 1)
+        dataset = Dataset(n_features=1)
+        dataset.append(Subset(x[:10]))
+        dataset.append(Subset(x[:0]))
+        dataset.append(Subset(x[10:]))
+
+        weights = np.zeros(20)
+        weights[10:] = 1
+        r1 = resample(dataset, n_samples=50, weights=weights, random_state=0)
+
+        self.assertEqual(len(r1), 1)
+        self.assertEqual(r1.samples.shape[0], 50)
+        self.assertTrue(np.all(r1.samples >= 10))
+
     def test_resample_sparse(self):
         """ Tests resample with sparse data """
         csr = csr_matrix(np.random.random((1000, 500)))
@@ -284,6 +339,57 @@ class UtilsTest(unittest.TestCase):
         self.assertEqual(len(r1), 10)
         self.assertEqual(len(r2), 10)
 
+    def test_train_test_split(self):
+        """ Tests that train_test_split partitions the samples of a dataset
+        and keeps the label proportions if stratify is True. """
+        x = np.arange(200).reshape(100, 2)
+        y = np.array([0, 0, 0, 1] * 25)
+        dataset = load_data(x, subset_size=30, y=y)
+
+        train, test = train_test_split(dataset, test_size=0.2,
+                                       stratify=True, random_state=0)
+
+        self.assertEqual(train.samples.shape[0], 80)
+        self.assertEqual(test.samples.shape[0], 20)
+        self.assertEqual(train.subsets_sizes(), [24, 24, 24, 8])
+        self.assertEqual(np.count_nonzero(test.labels), 5)
+
+        samples = np.vstack((train.samples, test.samples))
+        self.assertTrue(np.array_equal(np.sort(samples[:, 0]), x[:, 0]))
+
+        train2, test2 = train_test_split(dataset, test_size=20,
+                                         random_state=0)
+        _, test3 = train_test_split(dataset, test_size=20, random_state=0)
+
+        self.assertEqual(test2.samples.shape[0], 20)
+        self.assertTrue(np.array_equal(test2.samples, test3.samples))
+
+    def test_kfold(self):
+        """ Tests that every sample is in the test data of exactly one
+        split of KFold and StratifiedKFold. """
+        x = np.arange(100).reshape(50, 2)
+        y = np.array([0, 1] * 25)
+        dataset = load_data(x, subset_size=10, y=y)
+
+        for cv in (KFold(n_splits=4, shuffle=True, random_state=0),
+                   StratifiedKFold(n_splits=5)):
+            test_samples = []
+
+            for train, test in cv.split(dataset):
+                n_train = train.samples.shape[0]
+                n_test = test.samples.shape[0]
+                test_samples.append(test.samples)
+
+                self.assertEqual(n_train + n_test, 50)
+                self.assertLessEqual(abs(n_test - 50 / cv.get_n_splits()), 1)
+
+                if isinstance(cv, StratifiedKFold):
+                    self.assertEqual(np.count_nonzero(test.labels), 5)
+
+            test_samples = np.vstack(test_samples)
+            self.assertTrue(np.array_equal(np.sort(test_samples[:, 0]),
+                                           x[:, 0]))
+
 
 def main():
     unittest.main()